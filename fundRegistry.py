@@ -0,0 +1,84 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# fundRegistry.py
+#   -- frozen, hash-indexed fund metadata built ONCE at import time from the constants in investment.py
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+from collections import namedtuple
+from types import MappingProxyType
+from investment import COMPANY_NAME, FUND_NAME_CODE, FUNDS_LIST, MONEY_MKT_FUNDS
+
+RETIRED_PREFIX:str = 'x'
+# key of a trie node that completes a company name
+_TRIE_END:str = ""
+
+FundInfo = namedtuple("FundInfo", ["code", "company", "company_name", "money_market", "retired"])
+
+
+def _build_fund_info() -> MappingProxyType:
+    funds = {}
+    for code in FUNDS_LIST:
+        company = code.lstrip(RETIRED_PREFIX)[:3]
+        funds[code] = FundInfo(code, company, COMPANY_NAME[company], code in MONEY_MKT_FUNDS,
+                               code.startswith(RETIRED_PREFIX))
+    return MappingProxyType(funds)
+
+def _build_name_trie() -> MappingProxyType:
+    """:return nested read-only dicts of the lower case characters of each company name, ending with _TRIE_END -> code"""
+    root = {}
+    for name, company in FUND_NAME_CODE.items():
+        node = root
+        for char in name.lower():
+            node = node.setdefault(char, {})
+        node[_TRIE_END] = company
+
+    def freeze(node:dict) -> MappingProxyType:
+        return MappingProxyType({key: (value if key == _TRIE_END else freeze(value)) for key, value in node.items()})
+    return freeze(root)
+
+
+FUND_INFO = _build_fund_info()
+NAME_TRIE = _build_name_trie()
+MONEY_MKT_CODES = frozenset(MONEY_MKT_FUNDS)
+RETIRED_CODES   = frozenset(code for code, info in FUND_INFO.items() if info.retired)
+COMPANY_CODES   = frozenset(COMPANY_NAME)
+
+
+def get_fund_info(p_code:str) -> FundInfo:
+    """:return the FundInfo of a fund code, e.g. 'CIG 1304', or None if NOT a known fund"""
+    return FUND_INFO.get(p_code)
+
+def get_company(p_code:str) -> str:
+    """:return the company code of a fund code, e.g. 'CIG' for 'CIG 1304' or 'xDYN 729', or None if NOT a known fund"""
+    info = FUND_INFO.get(p_code)
+    return info.company if info else None
+
+def is_money_market(p_code:str) -> bool:
+    return p_code in MONEY_MKT_CODES
+
+def is_retired(p_code:str) -> bool:
+    return p_code in RETIRED_CODES
+
+def match_company(p_text:str) -> str:
+    """
+    Match the START of a line of report text to a company name, ignoring case, e.g. 'Signature High Income ...' -> CIG
+    :param  p_text: report text
+    :return company code of the longest name that is a whole word at the start of the text, or None if no match
+    """
+    node = NAME_TRIE
+    found = None
+    for posn, char in enumerate(p_text.lower()):
+        node = node.get(char)
+        if node is None:
+            return found
+        if _TRIE_END in node and (posn + 1 == len(p_text) or not p_text[posn + 1].isalnum()):
+            found = node[_TRIE_END]
+    return found
@@ -0,0 +1,303 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncBalances.py
+#   -- account balances of a Gnucash SQLite book kept up to date between runs by applying ONLY the newly entered splits
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import os
+import pickle
+import sqlite3
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+from gncSplits import tree_account_from_path, tree_descendants, file_version, ROOT_NAME, ACCOUNT_SEPARATOR
+from gncLock import get_book_path
+from sys import path
+path.append("/home/marksa/git/Python/utils")
+from mhsUtils import Decimal, ZERO, lg, osp
+
+# the book root is the one in the books table, NOT the template root
+SQL_ROOT     = "SELECT root_account_guid FROM books"
+SQL_ACCOUNTS = "SELECT a.guid, a.name, a.parent_guid, c.namespace || ':' || c.mnemonic " \
+               "FROM accounts a LEFT JOIN commodities c ON a.commodity_guid = c.guid"
+SQL_HIGH_WATER = "SELECT max(enter_date), count(*) FROM transactions"
+SQL_SPLITS = "SELECT s.account_guid, s.quantity_num, s.quantity_denom, t.post_date, s.rowid " \
+             "FROM splits s JOIN transactions t ON s.tx_guid = t.guid WHERE t.enter_date > ? AND t.enter_date <= ?"
+# per account number of splits and newest split row: read from the account index ALONE, with NO join,
+# and changed by ANY split added to, deleted from or moved between accounts
+SQL_SIGNATURE = "SELECT account_guid, count(*), max(rowid) FROM splits GROUP BY account_guid"
+
+# sorts before ANY Gnucash enter_date
+NO_ENTER_DATE:str = ""
+
+
+@lru_cache(maxsize = 8192)
+def _post_ordinal(p_post_date:str) -> int:
+    """:return date ordinal of a Gnucash SQL post_date, e.g. '2024-03-15 10:59:00'"""
+    return date(int(p_post_date[:4]), int(p_post_date[5:7]), int(p_post_date[8:10])).toordinal()
+
+def _quantity(p_num:int, p_denom:int) -> Decimal:
+    return Decimal(p_num) / Decimal(p_denom)
+
+def is_sqlite_book(p_file:str) -> bool:
+    if not osp.isfile(p_file):
+        return False
+    with open(p_file, "rb") as fp:
+        return fp.read(16) == b"SQLite format 3\x00"
+
+
+class BalanceStore:
+    """
+    Per account, the summed split amounts of each day, as of the last processed transaction entry time.
+    Each update reads ONLY the splits of transactions entered since then, straight from the SQLite tables,
+    and re-reads the accounts whose number of splits or newest split does NOT match what was applied.
+    Splits edited in place keep their rows so are ONLY caught by verify(), which reads ALL the splits.
+    """
+    STORE_VERSION = 2
+
+    def __init__(self, p_gncfile:str, p_folder:str, p_logger:lg.Logger = None):
+        """
+        :param  p_gncfile: Gnucash SQLite file name or URI
+        :param   p_folder: for the store file
+        """
+        self._lgr = p_logger
+        self._book_file = get_book_path(p_gncfile)
+        self._store_file = osp.join(p_folder, osp.basename(self._book_file) + ".balances")
+        self.clear()
+
+    def clear(self):
+        self._last_entered = NO_ENTER_DATE
+        self._high_water = None  # (max enter_date, number of transactions) at the last update
+        self._version = None     # file version when the balances were last known to be current
+        self._signature = {}     # account guid -> (number of splits, max split rowid) at the last update
+        self._days = {}          # account guid -> {date ordinal -> summed amount}
+        self._clear_accounts()
+
+    def _clear_accounts(self):
+        self._guids = {}         # full name -> account guid
+        self._children = {}      # full name -> list of child full names
+        self._commodity = {}     # full name -> 'namespace:mnemonic'
+        self._prefix = {}        # account guid -> (sorted ordinals, cumulative sums), computed on demand
+
+    def get_store_file(self) -> str:
+        return self._store_file
+
+    def get_last_entered(self) -> str:
+        return self._last_entered
+
+    def is_supported(self) -> bool:
+        return is_sqlite_book(self._book_file)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(F"file:{self._book_file}?mode=ro", uri = True)
+        # ONE read transaction so ALL the queries see the same version of the book
+        conn.execute("BEGIN")
+        return conn
+
+    def is_current(self) -> bool:
+        """
+        cheap while the file is NOT written; after a write, compares the high-water mark AND the account signatures,
+        from the indexes, so added, deleted or moved splits are caught
+        :return True if the balances match the Gnucash file, EXCEPT for any splits edited in place
+        """
+        if self._high_water is None:
+            return False
+        version = file_version(self._book_file)
+        if version == self._version:
+            return True
+        conn = self._connect()
+        try:
+            current = tuple(conn.execute(SQL_HIGH_WATER).fetchone()) == self._high_water \
+                      and self._read_signature(conn) == self._signature
+        finally:
+            conn.close()
+        if current:
+            self._version = version
+        return current
+
+    def _load_accounts(self, p_conn:sqlite3.Connection):
+        self._clear_accounts()
+        root = p_conn.execute(SQL_ROOT).fetchone()[0]
+        rows = {guid: (name, parent, comm) for guid, name, parent, comm in p_conn.execute(SQL_ACCOUNTS)}
+        full_names = {root: ROOT_NAME}
+
+        def full_name(guid:str) -> str:
+            if guid not in full_names:
+                name, parent = rows[guid][:2]
+                parent_name = full_name(parent)
+                full_names[guid] = name if parent_name == ROOT_NAME else parent_name + ACCOUNT_SEPARATOR + name
+            return full_names[guid]
+
+        self._children[ROOT_NAME] = []
+        for guid, (name, parent, comm) in rows.items():
+            # skip the template accounts, which are NOT under the book root
+            top = guid
+            while top in rows and rows[top][1] in rows:
+                top = rows[top][1]
+            if top != root:
+                continue
+            acct_name = full_name(guid)
+            self._guids[acct_name] = guid
+            self._commodity[acct_name] = comm
+            self._children.setdefault(acct_name, [])
+            if guid != root:
+                self._children.setdefault(full_names[parent], []).append(acct_name)
+
+    def _apply(self, p_rows, p_signature:dict = None) -> int:
+        """
+        add split rows of (account guid, quantity num, quantity denom, post date, rowid) to the daily sums
+        :param  p_signature: OPTIONAL account signatures to add the splits to
+        """
+        count = 0
+        for guid, num, denom, post_date, rowid in p_rows:
+            days = self._days.setdefault(guid, {})
+            ordinal = _post_ordinal(post_date)
+            days[ordinal] = days.get(ordinal, ZERO) + _quantity(num, denom)
+            self._prefix.pop(guid, None)
+            if p_signature is not None:
+                num_splits, max_rowid = p_signature.get(guid, (0, 0))
+                p_signature[guid] = (num_splits + 1, max(max_rowid, rowid))
+            count += 1
+        return count
+
+    def _read_signature(self, p_conn:sqlite3.Connection) -> dict:
+        return {guid: (num_splits, max_rowid) for guid, num_splits, max_rowid in p_conn.execute(SQL_SIGNATURE)}
+
+    def _reread_account(self, p_conn:sqlite3.Connection, p_guid:str) -> int:
+        self._days.pop(p_guid, None)
+        self._prefix.pop(p_guid, None)
+        return self._apply(p_conn.execute(SQL_SPLITS + " AND s.account_guid = ?",
+                                          (NO_ENTER_DATE, self._last_entered, p_guid)))
+
+    def update(self) -> int:
+        """
+        bring the balances up to date with the Gnucash file
+        :return number of splits read
+        """
+        version = file_version(self._book_file)
+        conn = self._connect()
+        try:
+            self._load_accounts(conn)
+            high_water = tuple(conn.execute(SQL_HIGH_WATER).fetchone())
+            new_last = high_water[0] or NO_ENTER_DATE
+            signature = self._read_signature(conn)
+            count = 0
+
+            # the transactions entered since the last update
+            expected = dict(self._signature)
+            if new_last > self._last_entered:
+                count += self._apply(conn.execute(SQL_SPLITS, (self._last_entered, new_last)), expected)
+            self._last_entered = new_last
+
+            # then re-read ONLY the accounts with added, deleted or moved splits among those ALREADY applied
+            changed = [guid for guid in set(signature) | set(expected) if signature.get(guid) != expected.get(guid)]
+            for guid in changed:
+                count += self._reread_account(conn, guid)
+            if changed and self._lgr and self._signature:
+                self._lgr.warning(F"re-read {len(changed)} accounts with changed or back-dated splits")
+
+            self._signature = signature
+            self._high_water = high_water
+            self._version = version
+        finally:
+            conn.close()
+        if self._lgr: self._lgr.info(F"read {count} splits: balances as of entry '{self._last_entered}'")
+        return count
+
+    def verify(self) -> list:
+        """
+        update, then compare the balances of EVERY account with ALL its splits, to catch splits edited in place:
+        a full scan of the splits, so call it explicitly, e.g. once per batch run, NOT on every query
+        :return full names of the accounts that did NOT match and have been re-read
+        """
+        self.update()
+        conn = self._connect()
+        try:
+            applied = self._days
+            self._days = {}
+            self._prefix = {}
+            self._apply(conn.execute(SQL_SPLITS, (NO_ENTER_DATE, self._last_entered)))
+        finally:
+            conn.close()
+        names = {guid: name for name, guid in self._guids.items()}
+        wrong = sorted(names.get(guid, guid) for guid in set(applied) | set(self._days)
+                       if applied.get(guid) != self._days.get(guid))
+        if wrong and self._lgr:
+            self._lgr.warning(F"re-read {len(wrong)} accounts with splits edited in place: {wrong}")
+        return wrong
+
+    def save(self):
+        os.makedirs(osp.dirname(self._store_file), exist_ok = True)
+        data = {
+            "version"      : self.STORE_VERSION ,
+            "last entered" : self._last_entered ,
+            "high water"   : self._high_water ,
+            "signature"    : self._signature ,
+            "days"         : {guid: {ordinal: str(amount) for ordinal, amount in days.items()}
+                              for guid, days in self._days.items()}
+        }
+        # write to a temp file then rename so readers NEVER see a partial store
+        temp_file = self._store_file + ".tmp"
+        with open(temp_file, "wb") as fp:
+            pickle.dump(data, fp, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, self._store_file)
+        if self._lgr: self._lgr.info(F"saved balances of {len(self._days)} accounts to '{self._store_file}'")
+
+    def load(self) -> bool:
+        """:return True if a store file was loaded: call update() to apply any newer transactions"""
+        self.clear()
+        if not osp.isfile(self._store_file):
+            return False
+        try:
+            with open(self._store_file, "rb") as fp:
+                data = pickle.load(fp)
+        except Exception as ex:
+            if self._lgr: self._lgr.warning(F"could NOT read balance store '{self._store_file}': {repr(ex)}")
+            return False
+        if data.get("version") != self.STORE_VERSION:
+            if self._lgr: self._lgr.info(F"balance store '{self._store_file}' is an OLD version")
+            return False
+        self._last_entered = data["last entered"]
+        self._high_water = data["high water"]
+        self._signature = data["signature"]
+        self._days = {guid: {ordinal: Decimal(amount) for ordinal, amount in days.items()}
+                      for guid, days in data["days"].items()}
+        return True
+
+    def account_from_path(self, p_path:list, p_top:str = ROOT_NAME) -> str:
+        return tree_account_from_path(self._children, p_path, p_top)
+
+    def get_account_balance(self, p_name:str, p_date:date) -> Decimal:
+        """:return sum of the split amounts of the account on or before the date, in the account commodity"""
+        guid = self._guids[p_name]
+        prefix = self._prefix.get(guid)
+        if prefix is None:
+            days = self._days.get(guid, {})
+            ordinals = sorted(days)
+            sums = [ZERO]
+            for ordinal in ordinals:
+                sums.append(sums[-1] + days[ordinal])
+            prefix = (ordinals, sums)
+            self._prefix[guid] = prefix
+        return prefix[1][bisect_right(prefix[0], p_date.toordinal())]
+
+    def get_total_balance(self, p_path:list, p_date:date, p_currency:str) -> Decimal:
+        """
+        :param      p_path: path to the account from the root
+        :param      p_date: to get the balance
+        :param  p_currency: 'namespace:mnemonic' of the currency
+        :return total balance of the account and its descendants OR None if any account is NOT in the currency
+        """
+        acct = self.account_from_path(p_path)
+        names = [acct] + tree_descendants(self._children, acct)
+        if any(self._commodity[name] != p_currency for name in names):
+            return None
+        return sum((self.get_account_balance(name, p_date) for name in names), ZERO)
@@ -0,0 +1,630 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncBench.py
+#   -- micro-benchmarks for the hot paths in gncUtils
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__          = "Mark Sattolo"
+__author_email__    = "epistemik@gmail.com"
+__gnucash_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import io
+import json
+import os
+import platform
+import tracemalloc
+from math import log10
+from random import Random
+from tempfile import mkdtemp
+from time import perf_counter
+from timeit import Timer
+from gnucash.gnucash_core_c import ACCT_TYPE_ASSET, ACCT_TYPE_MUTUAL, ACCT_TYPE_INCOME, ACCT_TYPE_EXPENSE
+from gncUtils import *
+from monarchParser import MonarchParser
+
+BENCH_SEED = 1957
+# kept OUTSIDE the temp book folders so each run is compared with the previous runs
+BENCH_RESULTS_FILE = osp.join(BASE_GNUCASH_FOLDER, "bench", "gncBench.jsonl")
+
+def _legacy_gnc_numeric_to_python_decimal(numeric:GncNumeric) -> Decimal:
+    """the original string-based conversion, kept ONLY as the benchmark reference"""
+    sign = 1 if numeric.negative_p() else 0
+    val = GncNumeric(numeric.num(), numeric.denom())
+    if not val.to_decimal(None):
+        raise Exception(F"GncNumeric value '{val.to_string()}' CANNOT be converted to decimal!")
+    digit_tuple = tuple(int(char) for char in str(val.num()) if char != '-')
+    exponent = int(log10(val.denom()))
+    return Decimal((sign, digit_tuple, -exponent))
+
+def make_numerics(count:int, seed:int = BENCH_SEED) -> list:
+    """
+    generate GncNumerics with the denominators found in a typical book: cents, units and prices
+    :param  count: number of values
+    :param   seed: for reproducible values
+    :return list of GncNumeric
+    """
+    rnd = Random(seed)
+    denoms = (100, 1000, 10000)
+    return [GncNumeric(rnd.randint(-10**9, 10**9), rnd.choice(denoms)) for _ in range(count)]
+
+def best_time(stmt, number:int = 1, repeat:int = 5) -> float:
+    """
+    :param    stmt: callable to time
+    :param  number: calls per timing
+    :param  repeat: number of timings
+    :return best time in seconds for ONE call
+    """
+    return min(Timer(stmt).repeat(repeat = repeat, number = number)) / number
+
+def bench_numeric_conversion(count:int = 100000, repeat:int = 5) -> dict:
+    """
+    compare the legacy GncNumeric -> Decimal conversion with the integer and batch conversions
+    :param   count: number of GncNumerics to convert
+    :param  repeat: number of timings
+    :return dict of best times in seconds and the speedups versus the legacy conversion
+    """
+    numerics = make_numerics(count)
+    # all three conversions MUST agree
+    assert [_legacy_gnc_numeric_to_python_decimal(n) for n in numerics] == gnc_numerics_to_python_decimals(numerics)
+
+    legacy = best_time(lambda: [_legacy_gnc_numeric_to_python_decimal(n) for n in numerics], repeat = repeat)
+    single = best_time(lambda: [gnc_numeric_to_python_decimal(n) for n in numerics], repeat = repeat)
+    batch  = best_time(lambda: gnc_numerics_to_python_decimals(numerics), repeat = repeat)
+    return {
+        "count"          : count ,
+        "legacy"         : legacy ,
+        "single"         : single ,
+        "batch"          : batch ,
+        "single speedup" : legacy / single ,
+        "batch speedup"  : legacy / batch
+    }
+
+def add_bench_account(p_session:GnucashSession, p_name:str, p_parent:Account, p_type:int,
+                      p_comm:GncCommodity = None) -> Account:
+    """add an account to the book of an OPEN session"""
+    acct = Account(p_session.get_book())
+    acct.SetName(p_name)
+    acct.SetType(p_type)
+    acct.SetCommodity(p_session.get_currency() if p_comm is None else p_comm)
+    p_session.add_account(acct, p_parent)
+    return acct
+
+def build_bench_accounts(p_session:GnucashSession, p_funds:list) -> dict:
+    """
+    create the investment account tree used by create_trade_tx in the book of an OPEN session
+    :param  p_session: with a NEW book
+    :param    p_funds: fund codes e.g. from FUNDS_LIST
+    :return dict of ASSET -> {fund code -> Account}, REV -> revenue Account
+    """
+    root = p_session.get_root_acct()
+    comm_table = p_session.get_book().get_table()
+    for name in (HOLD, FIN_SERV):
+        add_bench_account(p_session, name, root, ACCT_TYPE_ASSET if name == HOLD else ACCT_TYPE_EXPENSE)
+
+    parent = root
+    for name in ACCT_PATHS[ASSET] + [OPEN]:
+        parent = add_bench_account(p_session, name, parent, ACCT_TYPE_ASSET)
+    funds = {}
+    for fund in p_funds:
+        comm = GncCommodity(p_session.get_book(), fund, FUND.upper(), fund.replace(' ', ''), "", 10000)
+        comm_table.insert(comm)
+        funds[fund] = add_bench_account(p_session, fund, parent, ACCT_TYPE_MUTUAL, comm)
+
+    parent = root
+    for name in ACCT_PATHS[REV] + [OPEN]:
+        parent = add_bench_account(p_session, name, parent, ACCT_TYPE_INCOME)
+    return {ASSET: funds, REV: parent}
+
+def make_trade_record(p_logger:lg.Logger, count:int, accounts:dict, seed:int = BENCH_SEED) -> InvestmentRecord:
+    """
+    generate an InvestmentRecord of OPEN plan trades: purchases, redemptions, distributions and switches
+    :param  p_logger: for the record
+    :param     count: approximate number of trades
+    :param  accounts: from build_bench_accounts()
+    :param      seed: for reproducible trades
+    """
+    rnd = Random(seed)
+    funds = list(accounts[ASSET])
+    record = InvestmentRecord(p_logger)
+    while record.get_size(OPEN, TRADE) < count:
+        fund = rnd.choice(funds)
+        units = rnd.randint(1, 10**7)
+        gross = rnd.randint(1, 10**6)
+        trade = { TRADE_DAY: rnd.randint(1, 28), TRADE_MTH: rnd.randint(1, 12), TRADE_YR: rnd.randint(2000, 2025),
+                  FUND: fund, ACCT: accounts[ASSET][fund], REV: accounts[REV], NOTES: "bench", GROSS: gross, NET: gross,
+                  UNITS: units, TYPE: rnd.choice((PURCH, RDMPN, REINV, SW_OUT)) }
+        if trade[TYPE] == RDMPN:
+            trade.update({GROSS: -gross, NET: -gross, UNITS: -units})
+        trade[DESC] = F"{trade[TYPE]}: {fund}"
+        record.add_tx(OPEN, TRADE, trade)
+        if trade[TYPE] == SW_OUT:
+            # the switch out of one fund is matched by a switch in to another
+            trade.update({GROSS: -gross, NET: -gross, UNITS: -units})
+            other = rnd.choice(funds)
+            record.add_tx(OPEN, TRADE, dict(trade, **{TYPE: SW_IN, FUND: other, ACCT: accounts[ASSET][other],
+                                                      GROSS: gross, NET: gross, UNITS: rnd.randint(1, 10**7),
+                                                      DESC: F"{SW_IN}: {other}"}))
+    return record
+
+def bench_trade_import(p_logger:lg.Logger, counts:tuple = (1000, 10000), num_funds:int = 20, folder:str = None) -> dict:
+    """
+    throughput of create_trade_tx one trade at a time versus create_trade_txs for a whole InvestmentRecord,
+    each in a NEW SQLite book
+    :param  p_logger: for the sessions
+    :param    counts: number of synthetic trades for each run
+    :param num_funds: number of fund accounts
+    :param    folder: for the books, default is a new temp folder
+    :return dict of count -> trades per second for each method
+    """
+    folder = mkdtemp(prefix = "gncBench") if folder is None else folder
+    results = {}
+    for count in counts:
+        results[count] = {}
+        for method in ("single", "batch"):
+            gnc_file = osp.join(folder, F"trades_{method}_{count}.gnucash")
+            if osp.exists(gnc_file):
+                os.remove(gnc_file)
+            session = GnucashSession(SEND, "sqlite3://" + gnc_file, TRADE, p_logger)
+            session.begin_session(p_new = True)
+            try:
+                accounts = build_bench_accounts(session, FUNDS_LIST[:num_funds])
+                record = make_trade_record(p_logger, count, accounts)
+                start = perf_counter()
+                if method == "single":
+                    pairs, _ = pair_trades(record.get_trades(OPEN))
+                    for tx1, tx2 in pairs:
+                        session.create_trade_tx(tx1, tx2)
+                else:
+                    session.create_trade_txs(record)
+                elapsed = perf_counter() - start
+            finally:
+                session.end_session(True)
+            results[count][method] = record.get_size(OPEN, TRADE) / elapsed
+    return results
+
+def check_ledger_imports(p_logger:lg.Logger, num_trades:int = 100, num_funds:int = 5, folder:str = None) -> dict:
+    """
+    load the prices of a record with an ingest ledger, THEN create its trades with the same ledger, in a NEW SQLite book:
+    the prices must NOT mark the trades as imported
+    :param    p_logger: for the session
+    :param  num_trades: approximate number of synthetic trades
+    :param   num_funds: number of fund accounts, each with one price
+    :param      folder: for the book and ledger, default is a new temp folder
+    :return results of create_trade_txs()
+    """
+    folder = mkdtemp(prefix = "gncBench") if folder is None else folder
+    gnc_file = osp.join(folder, "ledger_check.gnucash")
+    for fname in (gnc_file, osp.join(folder, "ledger_check.txt")):
+        if osp.exists(fname):
+            os.remove(fname)
+    ledger = IngestLedger(osp.join(folder, "ledger_check.txt"), p_logger)
+    session = GnucashSession(SEND, "sqlite3://" + gnc_file, BOTH, p_logger)
+    session.begin_session(p_new = True)
+    try:
+        accounts = build_bench_accounts(session, FUNDS_LIST[:num_funds])
+        record = make_trade_record(p_logger, num_trades, accounts)
+        for fund in accounts[ASSET]:
+            record.add_tx(OPEN, PRICE, {FUND: fund, DATE: "15-Mar-2024", PRICE: "$12.3456"})
+        session.load_prices(record, ledger)
+        result = session.create_trade_txs(record, ledger)
+    finally:
+        session.end_session(True)
+    num_pairs = len(pair_trades(record.get_trades(OPEN))[0])
+    if result["built"] + len(result["imbalanced"]) != num_pairs:
+        raise Exception(F"ledger skipped trades: built {result['built']} of {num_pairs} after loading the prices!")
+    return result
+
+def bench_tx_records(p_logger:lg.Logger, count:int = 50000, seed:int = BENCH_SEED) -> dict:
+    """
+    memory and construction throughput of TxRecord versus CompactTxRecord for the same parsed report lines
+    :param  p_logger: for the TxRecords, set it to WARNING to measure the objects rather than the log output
+    :param     count: number of records
+    :param      seed: for reproducible values
+    :return dict of bytes per record and records per second for each class
+    """
+    rnd = Random(seed)
+    rows = [(dt(rnd.randint(2000, 2025), rnd.randint(1, 12), rnd.randint(1, 28)), rnd.choice(FUNDS_LIST),
+             F"{rnd.randint(1, 10**6) / 100:.2f}", F"{rnd.randint(1, 10**6) / 10000:.4f}",
+             F"{rnd.randint(1, 10**8) / 10000:.4f}") for _ in range(count)]
+
+    def make_full():
+        return [TxRecord(p_logger, day, day.strftime("%d-%b-%Y"), False, code[:3], code, code, float(gross), gross,
+                         float(price), price, float(units), units) for day, code, gross, price, units in rows]
+
+    def make_compact():
+        return [CompactTxRecord.from_strings(day, "", False, code[:3], code, code, gross, price, units)
+                for day, code, gross, price, units in rows]
+
+    results = {}
+    for name, maker in (("TxRecord", make_full), ("CompactTxRecord", make_compact)):
+        tracemalloc.start()
+        records = maker()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del records
+        results[name] = {"bytes per record": size / count, "records per second": count / best_time(maker, repeat = 3)}
+    return results
+
+def make_compact_record(p_logger:lg.Logger, count:int, seed:int = BENCH_SEED) -> InvestmentRecord:
+    """:return InvestmentRecord with count random CompactTxRecords spread over the plans and types"""
+    rnd = Random(seed)
+    record = InvestmentRecord(p_logger, MON_MARK)
+    for _ in range(count):
+        code = rnd.choice(FUNDS_LIST)
+        record.add_tx(rnd.choice((OPEN,TFSA,RRSP)), rnd.choice((TRADE,PRICE)),
+                      CompactTxRecord(dt(rnd.randint(2000, 2025), rnd.randint(1, 12), rnd.randint(1, 28)), "", False,
+                                      code[:3], code, code, rnd.randint(-10**6, 10**6), rnd.randint(1, 10**6),
+                                      rnd.randint(-10**8, 10**8)))
+    return record
+
+def bench_record_serialization(p_logger:lg.Logger, count:int = 100000) -> dict:
+    """
+    write and read times and sizes of an InvestmentRecord as JSON Lines and as the columnar binary format
+    :param  p_logger: for the records
+    :param     count: number of transactions
+    :return dict of format -> seconds to write, seconds to read and bytes
+    """
+    record = make_compact_record(p_logger, count)
+    columnar = ColumnarInvestmentRecord.from_record(record)
+
+    def write_jsonl():
+        buffer = io.StringIO()
+        record.to_json_lines(buffer)
+        return buffer
+
+    def write_binary():
+        buffer = io.BytesIO()
+        columnar.to_binary(buffer)
+        return buffer
+
+    jsonl = write_jsonl().getvalue()
+    binary = write_binary().getvalue()
+    assert InvestmentRecord.from_json_lines(p_logger, io.StringIO(jsonl)).get_size() == count
+    assert ColumnarInvestmentRecord.from_binary(io.BytesIO(binary)).get_size() == count
+    return {
+        "jsonl"  : { "write": best_time(write_jsonl, repeat = 3), "bytes": len(jsonl.encode("utf-8")),
+                     "read": best_time(lambda: InvestmentRecord.from_json_lines(p_logger, io.StringIO(jsonl)), repeat = 3) } ,
+        "binary" : { "write": best_time(write_binary, repeat = 3), "bytes": len(binary),
+                     "read": best_time(lambda: ColumnarInvestmentRecord.from_binary(io.BytesIO(binary)), repeat = 3) }
+    }
+
+def make_monarch_report(num_txs:int, txs_per_fund:int = 50, p_owner:str = MON_MARK, seed:int = BENCH_SEED) -> list:
+    """:return lines of a synthetic Monarch report of ONE owner in the layout read by MonarchParser, with num_txs trades"""
+    rnd = Random(seed)
+    tx_types = (PURCH, RDMPN, SW_IN, SW_OUT, REINV + " Distribution")
+    funds = [code for code in FUNDS_LIST if not code.startswith('x')]
+    lines = [CLIENT_TX, F"{DATE}: 15-Mar-2024", p_owner]
+    count = 0
+    while count < num_txs:
+        for plan in (OPEN,TFSA,RRSP):
+            lines.append(F"{plan} 12345")
+            code = rnd.choice(funds)
+            lines.append(COMPANY_NAME[code[:3]])
+            lines.append(F"{code} Fund Series A")
+            lines.append(F"{PRICE}: ${rnd.randint(1, 10**6) / 10000:.4f} as of 15-Mar-2024")
+            for _ in range(txs_per_fund):
+                day = dt(rnd.randint(2000, 2024), rnd.randint(1, 12), rnd.randint(1, 28)).strftime("%d-%b-%Y")
+                gross = rnd.randint(-10**6, 10**6) / 100
+                gross_str = F"(${-gross:,.2f})" if gross < 0 else F"${gross:,.2f}"
+                lines.append(F"{day} {rnd.choice(tx_types)} {gross_str} ${rnd.randint(1, 10**6) / 10000:.4f}"
+                             F" {rnd.randint(1, 10**8) / 10000:.4f}")
+                count += 1
+    return lines
+
+def bench_report_parsing(p_logger:lg.Logger, counts:tuple = (10000, 100000)) -> dict:
+    """
+    throughput of MonarchParser on synthetic reports
+    :param  p_logger: for the parser and records
+    :param    counts: numbers of trades per report
+    :return dict of count -> lines per second and transactions per second
+    """
+    results = {}
+    for count in counts:
+        lines = make_monarch_report(count)
+        record = MonarchParser(p_logger).parse(lines)
+        assert record.get_size(type_spec = TRADE) >= count
+        elapsed = best_time(lambda: MonarchParser(p_logger).parse(lines), repeat = 3)
+        results[count] = {"lines per second": len(lines) / elapsed, "transactions per second": record.get_size() / elapsed}
+    return results
+
+def _plan_paths(p_acct_type:str) -> dict:
+    """:return (plan, owner) -> account path in the ACCT_PATHS layout, owner is "" for OPEN"""
+    paths = {(OPEN, ""): ACCT_PATHS[p_acct_type] + [OPEN]}
+    for plan in (RRSP,TFSA):
+        for owner in (MON_MARK,MON_LULU):
+            paths[(plan, owner)] = ACCT_PATHS[p_acct_type] + [plan, ACCT_PATHS[owner]]
+    return paths
+
+def _add_bench_path(p_session:GnucashSession, p_path:list, p_type:int) -> Account:
+    """:return the last account of the path, adding any that are missing"""
+    parent = p_session.get_root_acct()
+    for name in p_path:
+        acct = parent.lookup_by_name(name)
+        parent = add_bench_account(p_session, name, parent, p_type) if acct is None else acct
+    return parent
+
+def generate_bench_book(p_gncfile:str, p_logger:lg.Logger, num_funds:int = 20, splits_per_account:int = 200,
+                        prices_per_fund:int = 100, seed:int = BENCH_SEED) -> dict:
+    """
+    write a NEW synthetic book with the ACCT_PATHS layout: a fund account of each of the funds under EVERY plan and owner,
+    each with trades against the matching revenue account, and a price history for each fund
+    :param            p_gncfile: Gnucash URI, e.g. 'sqlite3:///tmp/bench.gnucash' or 'xml:///tmp/bench.gnucash'
+    :param             p_logger: for the session
+    :param            num_funds: number of funds from FUNDS_LIST
+    :param   splits_per_account: number of trades in each fund account
+    :param      prices_per_fund: number of prices of each fund
+    :param                 seed: for a reproducible book
+    :return dict of ASSET -> list of fund account paths, REV -> list of revenue account paths, FUND -> fund codes
+    """
+    book_path = get_book_path(p_gncfile)
+    if osp.exists(book_path):
+        os.remove(book_path)
+    rnd = Random(seed)
+    funds = [code for code in FUNDS_LIST if not is_money_market(code)][:num_funds]
+    layout = {ASSET: [], REV: [], FUND: funds}
+
+    session = GnucashSession(SEND, p_gncfile, BOTH, p_logger)
+    session.begin_session(p_new = True)
+    try:
+        book = session.get_book()
+        currency = session.get_currency()
+        comm_table = book.get_table()
+        for name in (HOLD, FIN_SERV):
+            add_bench_account(session, name, session.get_root_acct(), ACCT_TYPE_ASSET if name == HOLD else ACCT_TYPE_EXPENSE)
+        trust = _add_bench_path(session, [TRUST], ACCT_TYPE_ASSET)
+
+        comms = {}
+        # the trust fund may ALSO be in the fund list: insert each commodity ONCE
+        for fund in dict.fromkeys(funds + [TRUST_AST_ACCT]):
+            comm = GncCommodity(book, fund, FUND.upper(), fund.replace(' ', ''), "", 10000)
+            # insert() returns the commodity ALREADY in the table, if any, and destroys the new one
+            comms[fund] = comm_table.insert(comm)
+        fund_accts = [add_bench_account(session, TRUST_AST_ACCT, trust, ACCT_TYPE_MUTUAL, comms[TRUST_AST_ACCT])]
+        rev_accts = [add_bench_account(session, TRUST_REV_ACCT, trust, ACCT_TYPE_INCOME)]
+        layout[ASSET].append([TRUST, TRUST_AST_ACCT])
+        layout[REV].append([TRUST, TRUST_REV_ACCT])
+
+        rev_paths = _plan_paths(REV)
+        for key, ast_path in _plan_paths(ASSET).items():
+            ast_parent = _add_bench_path(session, ast_path, ACCT_TYPE_ASSET)
+            rev_parent = _add_bench_path(session, rev_paths[key], ACCT_TYPE_INCOME)
+            layout[REV].append(rev_paths[key])
+            for fund in funds:
+                fund_accts.append(add_bench_account(session, fund, ast_parent, ACCT_TYPE_MUTUAL, comms[fund]))
+                rev_accts.append(rev_parent)
+                layout[ASSET].append(ast_path + [fund])
+
+        for fund_acct, rev_acct in zip(fund_accts, rev_accts):
+            for _ in range(splits_per_account):
+                gross = rnd.randint(-10**6, 10**7)
+                gtx = Transaction(book)
+                gtx.BeginEdit()
+                gtx.SetCurrency(currency)
+                gtx.SetDate(rnd.randint(1, 28), rnd.randint(1, 12), rnd.randint(2000, 2025))
+                gtx.SetDescription(F"bench: {fund_acct.GetName()}")
+                spl_ast = Split(book)
+                spl_ast.SetParent(gtx)
+                spl_ast.SetAccount(fund_acct)
+                spl_ast.SetValue(GncNumeric(gross, 100))
+                spl_ast.SetAmount(GncNumeric(gross * rnd.randint(50, 200), 10000))
+                spl_rev = Split(book)
+                spl_rev.SetParent(gtx)
+                spl_rev.SetAccount(rev_acct)
+                spl_rev.SetValue(GncNumeric(-gross, 100))
+                spl_rev.SetAmount(GncNumeric(-gross, 100))
+                gtx.CommitEdit()
+
+        price_db = book.get_price_db()
+        for comm in comms.values():
+            for _ in range(prices_per_fund):
+                gnc_price = GncPrice(book)
+                gnc_price.begin_edit()
+                gnc_price.set_time64(dt(rnd.randint(2000, 2025), rnd.randint(1, 12), rnd.randint(1, 28)))
+                gnc_price.set_commodity(comm)
+                gnc_price.set_currency(currency)
+                gnc_price.set_value(GncNumeric(rnd.randint(10**4, 10**6), 10000))
+                gnc_price.set_source_string('user:price')
+                gnc_price.set_typestr('nav')
+                gnc_price.commit_edit()
+                price_db.add_price(gnc_price)
+    finally:
+        session.end_session(True)
+    p_logger.info(F"generated '{p_gncfile}': {len(layout[ASSET])} fund accounts")
+    return layout
+
+def make_bench_periods(first_year:int = 2000, last_year:int = 2025) -> tuple:
+    """:return quarterly (period starts, period list) as used by fill_splits()"""
+    period_starts = [date(year, month, 1) for year in range(first_year, last_year + 1) for month in (1, 4, 7, 10)]
+    period_ends = [start - ONE_DAY for start in period_starts[1:]] + [date(last_year, 12, 31)]
+    return period_starts, [[start, end, ZERO, ZERO, ZERO] for start, end in zip(period_starts, period_ends)]
+
+def bench_hot_paths(p_gncfile:str, p_logger:lg.Logger, p_layout:dict, num_trades:int = 1000, repeat:int = 3) -> dict:
+    """
+    time the hot paths on a book from generate_bench_book(): reads in a read-only session,
+    trades and prices in a TEST session so they are rolled back and the book is NOT changed
+    :param   p_gncfile: Gnucash URI
+    :param    p_logger: for the sessions
+    :param    p_layout: from generate_bench_book()
+    :param  num_trades: for create_trade_tx and create_price
+    :param      repeat: number of timings
+    :return dict of hot path -> best seconds per call
+    """
+    period_starts, periods = make_bench_periods()
+    fund_paths = p_layout[ASSET][1:]
+    results = {}
+
+    session = GnucashSession(TEST, p_gncfile, TRADE, p_logger, p_read_only = True)
+    session.begin_session()
+    try:
+        index = session.get_account_index()
+        fund_accts = [index.account_from_path(path) for path in fund_paths]
+
+        def run_get_splits():
+            for acct in fund_accts:
+                get_splits(acct, period_starts, [list(period) for period in periods])
+        results["get_splits"] = best_time(run_get_splits, repeat = repeat) / len(fund_accts)
+
+        results["fill_splits"] = best_time(lambda: fill_splits(session.get_root_acct(), ACCT_PATHS[ASSET], period_starts,
+                                                               [list(period) for period in periods]), repeat = repeat)
+        end_date = date(2025, 12, 31)
+        results["get_total_balance"] = best_time(lambda: session.get_total_balance(ACCT_PATHS[ASSET], end_date),
+                                                 repeat = repeat)
+    finally:
+        session.end_session(False)
+
+    session = GnucashSession(TEST, p_gncfile, BOTH, p_logger)
+    session.begin_session()
+    try:
+        index = session.get_account_index()
+        open_path = _plan_paths(ASSET)[(OPEN, "")]
+        accounts = {ASSET: {fund: index.account_from_path(open_path + [fund]) for fund in p_layout[FUND]},
+                    REV: index.account_from_path(_plan_paths(REV)[(OPEN, "")])}
+        record = make_trade_record(p_logger, num_trades, accounts)
+        pairs, _ = pair_trades(record.get_trades(OPEN))
+
+        def run_trades():
+            for tx1, tx2 in pairs:
+                session.create_trade_tx(tx1, tx2)
+        results["create_trade_tx"] = best_time(run_trades, repeat = repeat) / record.get_size(OPEN, TRADE)
+
+        rnd = Random(BENCH_SEED)
+        ast_parent = index.account_from_path(open_path)
+        prices = [{FUND: rnd.choice(p_layout[FUND]), PRICE: F"${rnd.randint(1, 10**6) / 10000:.4f}",
+                   DATE: dt(rnd.randint(2000, 2025), rnd.randint(1, 12), rnd.randint(1, 28)).strftime("%d-%b-%Y")}
+                  for _ in range(num_trades)]
+
+        def run_prices():
+            for mtx in prices:
+                session.create_price(mtx, ast_parent)
+        results["create_price"] = best_time(run_prices, repeat = repeat) / num_trades
+    finally:
+        session.end_session(False)
+    return results
+
+def record_bench_results(p_results:dict, p_file:str, p_params:dict = None) -> dict:
+    """
+    append ONE run to a JSON Lines history file, to compare against later runs
+    :param  p_results: hot path -> seconds
+    :param     p_file: history file
+    :param   p_params: of the run, e.g. book format and size
+    :return the entry written
+    """
+    entry = {
+        "run"     : dt.now().isoformat(timespec = "seconds") ,
+        "host"    : platform.node() ,
+        "python"  : platform.python_version() ,
+        "params"  : p_params or {} ,
+        "results" : p_results
+    }
+    folder = osp.dirname(p_file)
+    if folder:
+        os.makedirs(folder, exist_ok = True)
+    with open(p_file, "a") as fp:
+        fp.write(json.dumps(entry) + "\n")
+    return entry
+
+def compare_bench_results(p_file:str, p_params:dict = None) -> dict:
+    """
+    :param    p_file: history file from record_bench_results()
+    :param  p_params: ONLY compare runs with the same parameters
+    :return hot path -> (previous seconds, latest seconds, latest / previous) for the two latest runs, empty if < 2 runs
+    """
+    with open(p_file) as fp:
+        runs = [entry for entry in (json.loads(line) for line in fp if line.strip())
+                if p_params is None or entry["params"] == p_params]
+    if len(runs) < 2:
+        return {}
+    previous, latest = runs[-2]["results"], runs[-1]["results"]
+    return {name: (previous[name], latest[name], latest[name] / previous[name])
+            for name in latest if previous.get(name)}
+
+def bench_books(p_logger:lg.Logger, formats:tuple = ("sqlite3", "xml"), num_funds:int = 20, splits_per_account:int = 200,
+                prices_per_fund:int = 100, results_file:str = BENCH_RESULTS_FILE, folder:str = None) -> dict:
+    """
+    generate a synthetic book in each format, time its hot paths and record them for regression comparison
+    :param             p_logger: for the sessions
+    :param              formats: Gnucash backends
+    :param  num_funds, splits_per_account, prices_per_fund: size of the books, see generate_bench_book()
+    :param         results_file: JSON Lines history, shared by ALL runs
+    :param               folder: for the books, default is a new temp folder
+    :return dict of format -> hot path -> seconds per call
+    """
+    folder = mkdtemp(prefix = "gncBench") if folder is None else folder
+    results = {}
+    for book_format in formats:
+        gnc_file = F"{book_format}://" + osp.join(folder, F"bench_{book_format}.gnucash")
+        layout = generate_bench_book(gnc_file, p_logger, num_funds, splits_per_account, prices_per_fund)
+        results[book_format] = bench_hot_paths(gnc_file, p_logger, layout)
+        params = {"format": book_format, "funds": num_funds, "splits": splits_per_account, "prices": prices_per_fund}
+        record_bench_results(results[book_format], results_file, params)
+        for name, (previous, latest, ratio) in compare_bench_results(results_file, params).items():
+            if ratio > 1.1:
+                p_logger.warning(F"{book_format} {name}: {latest:.6g} s is {ratio:.2f} x the previous run!")
+    return results
+
+class _BenchAccount:
+    """stands in for a Gnucash Account in the logging benchmark"""
+    def __init__(self, p_name:str):
+        self._name = p_name
+
+    def GetName(self) -> str:
+        return self._name
+
+def bench_lazy_logging(count:int = 100000, repeat:int = 5) -> dict:
+    """
+    per-split cost of a typical hot path debug message: eager f-string versus LazyLogger, and the quiet mode
+    :param   count: number of simulated splits
+    :param  repeat: number of timings
+    :return dict of nanoseconds per split for each case
+    """
+    logger = lg.getLogger("gncBench.lazy")
+    logger.propagate = False
+    logger.addHandler(lg.NullHandler())
+    lazy = LazyLogger(logger)
+    acct = _BenchAccount("CIG 1304")
+    amounts = [Decimal(num).scaleb(-2) for num in range(count)]
+
+    def eager():
+        for amount in amounts:
+            logger.debug(F"account = {acct.GetName()}; amount = {amount}")
+
+    def deferred():
+        for amount in amounts:
+            lazy.debug(lambda: F"account = {acct.GetName()}; amount = {amount}")
+
+    def quiet():
+        with lazy.quiet():
+            deferred()
+
+    results = {}
+    for level in (lg.INFO, lg.DEBUG):
+        logger.setLevel(level)
+        name = lg.getLevelName(level)
+        results[F"eager {name}"] = best_time(eager, repeat = repeat) / count * 1e9
+        results[F"lazy {name}"] = best_time(deferred, repeat = repeat) / count * 1e9
+    results["quiet DEBUG"] = best_time(quiet, repeat = repeat) / count * 1e9
+    return results
+
+
+if __name__ == "__main__":
+    for key, value in bench_numeric_conversion().items():
+        print(F"{key:>16} = {value:.6g}")
+    for case, nanos in bench_lazy_logging().items():
+        print(F"{case:>16} = {nanos:.0f} ns/split")
+    bench_lgr = lg.getLogger("gncBench")
+    bench_lgr.setLevel(lg.WARNING)
+    for rec_class, stats in bench_tx_records(bench_lgr).items():
+        print(F"{rec_class:>16}: " + ", ".join(F"{key} = {value:.0f}" for key, value in stats.items()))
+    for num_txs, stats in bench_report_parsing(bench_lgr).items():
+        print(F"{num_txs:>8} report txs: " + ", ".join(F"{key} = {value:.0f}" for key, value in stats.items()))
+    for rec_format, stats in bench_record_serialization(bench_lgr).items():
+        print(F"{rec_format:>16}: " + ", ".join(F"{key} = {value:.4g}" for key, value in stats.items()))
+    print(F"ledger check: {check_ledger_imports(bench_lgr)['built']} trades built after loading prices")
+    for num_trades, rates in bench_trade_import(bench_lgr).items():
+        print(F"{num_trades:>8} trades: " + ", ".join(F"{method} = {rate:.0f}/s" for method, rate in rates.items()))
+    for book_format, timings in bench_books(bench_lgr).items():
+        print(F"{book_format:>8} book: " + ", ".join(F"{name} = {secs:.4g} s" for name, secs in timings.items()))
@@ -0,0 +1,193 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncDaemon.py
+#   -- keep a read-only GnucashSession loaded and answer report queries over a Unix socket
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__          = "Mark Sattolo"
+__author_email__    = "epistemik@gmail.com"
+__gnucash_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from gncUtils import *
+
+# request operations
+OP_PING:str           = "ping"
+OP_TOTAL_BALANCE:str  = "total_balance"
+OP_ACCOUNT_ASSETS:str = "account_assets"
+OP_FILL_SPLITS:str    = "fill_splits"
+OP_SHOW_ACCOUNT:str   = "show_account"
+OP_STATS:str          = "stats"
+OP_RELOAD:str         = "reload"
+OP_SHUTDOWN:str       = "shutdown"
+
+DEFAULT_SOCKET = osp.join(BASE_GNUCASH_FOLDER, "gncDaemon.sock")
+
+
+def _to_json(obj):
+    """json.dumps default: dates as ISO strings and Decimals as strings"""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(F"CANNOT serialize {type(obj)}")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """ONE json request per line, ONE json response per line."""
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = {"ok": True, "result": self.server.daemon.dispatch(request.get("op"), request.get("args", {}))}
+            except Exception as ex:
+                response = {"ok": False, "error": repr(ex)}
+            self.wfile.write(json.dumps(response, default = _to_json).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class GncSessionDaemon:
+    """
+    Serve requests from ONE loaded read-only GnucashSession and reload it ONLY when the Gnucash file changes.
+    Each client connection has its own thread, so an idle client does NOT block the others,
+    but requests are dispatched one at a time since the Gnucash engine is NOT thread-safe.
+    """
+    def __init__(self, p_gncfile:str, p_logger:lg.Logger, p_socket:str = DEFAULT_SOCKET):
+        self._lgr = p_logger
+        self._gnc_file = p_gncfile
+        self._book_path = get_book_path(p_gncfile)
+        self._socket = p_socket
+        self._session = None
+        self._stat = None
+        self._fingerprint = None
+        self._server = None
+        self._dispatch_lock = threading.Lock()
+
+    def _stat_book(self) -> tuple:
+        stat = os.stat(self._book_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """(re)open the Gnucash file: the current session is ONLY replaced if the new one opens"""
+        # take the stat and fingerprint BEFORE reading so any concurrent change triggers another reload
+        stat = self._stat_book()
+        fingerprint = file_fingerprint(self._book_path)
+        session = GnucashSession(TEST, self._gnc_file, TRADE, self._lgr, p_read_only = True)
+        session.begin_session()
+        # the whole book is now in memory: do NOT keep other processes from updating the file
+        session.release_lock()
+
+        if self._session:
+            self._session.end_session(False)
+        self._session = session
+        self._stat = stat
+        self._fingerprint = fingerprint
+        self._lgr.info(F"loaded '{self._gnc_file}' at {get_current_time()}")
+
+    def book_changed(self) -> bool:
+        """check the cheap file stat first and ONLY compare the full fingerprint if the stat changed"""
+        stat = self._stat_book()
+        if stat == self._stat:
+            return False
+        fingerprint = file_fingerprint(self._book_path)
+        if fingerprint == self._fingerprint:
+            self._stat = stat
+            return False
+        return True
+
+    def dispatch(self, p_op:str, p_args:dict):
+        """
+        :param    p_op: one of the OP_ constants
+        :param  p_args: json arguments of the operation
+        :return json-serializable result
+        """
+        with self._dispatch_lock:
+            return self._dispatch(p_op, p_args)
+
+    def _dispatch(self, p_op:str, p_args:dict):
+        if p_op == OP_PING:
+            return get_current_time()
+        if p_op == OP_SHUTDOWN:
+            # shutdown() waits for serve_forever() to return so MUST run on another thread
+            threading.Thread(target = self._server.shutdown, daemon = True).start()
+            return "shutting down"
+        if p_op == OP_RELOAD or self.book_changed():
+            self.load()
+            if p_op == OP_RELOAD:
+                return "reloaded"
+
+        session = self._session
+        if p_op == OP_TOTAL_BALANCE:
+            return session.get_total_balance(p_args["path"], date.fromisoformat(p_args["date"]))
+        if p_op == OP_ACCOUNT_ASSETS:
+            return session.get_account_assets(p_args["accounts"], date.fromisoformat(p_args["date"]))
+        if p_op == OP_FILL_SPLITS:
+            period_starts = [date.fromisoformat(d) for d in p_args["period_starts"]]
+            periods = [[start, date.fromisoformat(end), ZERO, ZERO, ZERO]
+                       for start, end in zip(period_starts, p_args["period_ends"])]
+            fill_splits(session.get_root_acct(), p_args["path"], period_starts, periods, stats = session.get_stats())
+            return periods
+        if p_op == OP_SHOW_ACCOUNT:
+            index = session.get_account_index()
+            acct = index.account_from_path(p_args["path"])
+            return [index.get_full_name(acct)] + [index.get_full_name(sub) for sub in index.get_descendants(acct)]
+        if p_op == OP_STATS:
+            return session.get_stats().to_json()
+        raise Exception(F"BAD operation: {p_op}!")
+
+    def serve(self):
+        """load the Gnucash file and answer requests until a shutdown request"""
+        self.load()
+        if osp.exists(self._socket):
+            os.remove(self._socket)
+        self._server = socketserver.ThreadingUnixStreamServer(self._socket, _RequestHandler)
+        # do NOT wait for idle clients to disconnect at shutdown
+        self._server.daemon_threads = True
+        self._server.daemon = self
+        self._lgr.info(F"serving '{self._gnc_file}' on '{self._socket}'")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            os.remove(self._socket)
+            # wait for any request in progress
+            with self._dispatch_lock:
+                self._session.end_session(False)
+            self._lgr.info(F"daemon STOPPED at {get_current_time()}")
+
+
+def query_daemon(p_op:str, p_socket:str = DEFAULT_SOCKET, p_timeout:float = 60.0, **kwargs):
+    """
+    send ONE request to a running GncSessionDaemon
+    :param       p_op: one of the OP_ constants
+    :param   p_socket: of the daemon
+    :param  p_timeout: seconds
+    :param     kwargs: arguments of the operation: dates as date or ISO string, paths as lists
+    :return result of the operation: balances as Decimal
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(p_timeout)
+        sock.connect(p_socket)
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps({"op": p_op, "args": kwargs}, default = _to_json).encode("utf-8") + b"\n")
+            stream.flush()
+            response = json.loads(stream.readline())
+    if not response["ok"]:
+        raise Exception(F"daemon request '{p_op}' FAILED: {response['error']}")
+    result = response["result"]
+    if p_op == OP_TOTAL_BALANCE:
+        return Decimal(result)
+    if p_op == OP_FILL_SPLITS:
+        return [[date.fromisoformat(start), date.fromisoformat(end)] + [Decimal(val) for val in amounts]
+                for start, end, *amounts in result]
+    return result
@@ -0,0 +1,245 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncExport.py
+#   -- stream period lists, split aggregates and balance matrices to CSV or compact binary columnar files
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import csv
+import json
+import struct
+from itertools import islice
+from sys import stdout, byteorder
+from gncSplits import *
+from gncPeriods import PeriodSums
+
+CSV:str    = "csv"
+BINARY:str = "gncx"
+
+# column types
+COL_DATE:str    = "date"
+COL_DECIMAL:str = "decimal"
+COL_TEXT:str    = "text"
+
+BINARY_MAGIC   = b"GNCX"
+BINARY_VERSION = 2
+DEFAULT_CHUNK  = 10000
+TEXT_SEP       = "\x1f"
+
+# exponent of a decimal column chunk whose values do NOT ALL fit in int64 at a common exponent: stored as text
+DECIMAL_AS_TEXT = -128
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
+
+
+class ExportTable:
+    """Column names and types plus an iterable of rows that is ONLY consumed when the table is written."""
+    def __init__(self, p_columns:list, p_rows):
+        """
+        :param  p_columns: (name, type) of each column
+        :param     p_rows: iterable of tuples, e.g. a generator
+        """
+        self.columns = list(p_columns)
+        self.rows = p_rows
+
+    def get_names(self) -> list:
+        return [name for name, _ in self.columns]
+
+    def get_types(self) -> list:
+        return [col_type for _, col_type in self.columns]
+
+
+def period_table(periods:list) -> ExportTable:
+    """:param  periods: [start, end, debits, credits, total] rows as filled by gncUtils.fill_splits()"""
+    columns = [("period start", COL_DATE), ("period end", COL_DATE), ("debits", COL_DECIMAL),
+               ("credits", COL_DECIMAL), ("TOTAL", COL_DECIMAL)]
+    return ExportTable(columns, (tuple(period[:PERIOD_TOTAL + 1]) for period in periods))
+
+def aggregate_table(aggregate:SplitAggregate) -> ExportTable:
+    """:param  aggregate: per-account sums from gncSplits.aggregate_splits()"""
+    columns = [("account", COL_TEXT), ("period start", COL_DATE), ("period end", COL_DATE),
+               ("debits", COL_DECIMAL), ("credits", COL_DECIMAL), ("TOTAL", COL_DECIMAL)]
+
+    def rows():
+        for index, name in enumerate(aggregate.names):
+            yield from zip([name] * len(aggregate), aggregate.period_starts, aggregate.period_ends,
+                           aggregate.debits[index], aggregate.credits[index], aggregate.totals[index])
+    return ExportTable(columns, rows())
+
+def period_sums_table(sums:PeriodSums) -> ExportTable:
+    """:param  sums: per-period sums from gncPeriods.PeriodCalendar.bucket()"""
+    columns = [("period", COL_TEXT), ("period start", COL_DATE), ("period end", COL_DATE), ("debits", COL_DECIMAL),
+               ("credits", COL_DECIMAL), ("TOTAL", COL_DECIMAL), ("splits", COL_DECIMAL)]
+    calendar = sums.calendar
+    return ExportTable(columns, zip(calendar.labels, calendar.starts, calendar.ends, sums.debits, sums.credits,
+                                    sums.totals, (Decimal(count) for count in sums.counts)))
+
+def balance_table(matrix:BalanceMatrix) -> ExportTable:
+    """:param  matrix: balances from gncUtils.GnucashSession.get_balance_series()"""
+    columns = [("date", COL_DATE)] + [(item, COL_DECIMAL) for item in matrix.items]
+    return ExportTable(columns, ((bal_date,) + tuple(row) for bal_date, row in zip(matrix.dates, matrix.values)))
+
+def split_table(columns:SplitColumns) -> ExportTable:
+    """:param  columns: every split, e.g. from gncUtils.collect_splits()"""
+    def rows():
+        names = columns.names
+        for ordinal, acct_id, amount in zip(columns.dates, columns.accounts, columns.amounts):
+            yield date.fromordinal(ordinal), names[acct_id], amount
+    return ExportTable([("date", COL_DATE), ("account", COL_TEXT), ("amount", COL_DECIMAL)], rows())
+
+
+def iter_chunks(rows, chunk_size:int = DEFAULT_CHUNK):
+    """:return generator of lists of at most chunk_size rows"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_csv(table:ExportTable, fp, chunk_size:int = DEFAULT_CHUNK) -> int:
+    """
+    :param       table: to write
+    :param          fp: open text file
+    :param  chunk_size: rows held in memory at once
+    :return number of rows written
+    """
+    csv_writer = csv.writer(fp)
+    csv_writer.writerow(table.get_names())
+    count = 0
+    for chunk in iter_chunks(table.rows, chunk_size):
+        csv_writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+def _int64_bytes(values:list) -> bytes:
+    """:return little-endian int64s, the same on EVERY platform"""
+    data = array('q', values)
+    if byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+def _read_int64s(fp, p_count:int) -> array:
+    data = array('q')
+    data.frombytes(fp.read(p_count * data.itemsize))
+    if byteorder != "little":
+        data.byteswap()
+    return data
+
+def _scaled_int(val:Decimal, exponent:int) -> int:
+    """:return val * 10**-exponent EXACTLY: NOT rounded to the precision of the decimal context"""
+    sign, digits, exp = val.as_tuple()
+    scaled = int("".join(map(str, digits)) or "0") * 10 ** (exp - exponent)
+    return -scaled if sign else scaled
+
+def _encode_text(values:list) -> bytes:
+    data = TEXT_SEP.join(str(val) for val in values).encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+def _encode_column(values:list, col_type:str) -> bytes:
+    if col_type == COL_DATE:
+        return _int64_bytes([val.toordinal() for val in values])
+    if col_type == COL_DECIMAL:
+        # scale ALL the values in the chunk to the smallest exponent and store as 64-bit integers if they fit
+        exponents = [val.as_tuple().exponent for val in values]
+        if all(isinstance(exp, int) for exp in exponents):
+            exponent = min(exponents, default = 0)
+            if DECIMAL_AS_TEXT < exponent <= 127:
+                scaled = [_scaled_int(val, exponent) for val in values]
+                if all(INT64_MIN <= val <= INT64_MAX for val in scaled):
+                    return struct.pack("<b", exponent) + _int64_bytes(scaled)
+        # e.g. 1/3 to 28 digits, or tiny and huge values in the same chunk: keep EVERY digit
+        return struct.pack("<b", DECIMAL_AS_TEXT) + _encode_text(values)
+    return _encode_text(values)
+
+def write_binary(table:ExportTable, fp, chunk_size:int = DEFAULT_CHUNK) -> int:
+    """
+    compact columnar format: magic, version, json header, then chunks of
+    [row count, date column as int64 day ordinals, decimal column as exponent + scaled int64s,
+     OR DECIMAL_AS_TEXT + text if they do NOT fit, text column as length + joined utf-8], ALL little-endian
+    :param       table: to write
+    :param          fp: open binary file
+    :param  chunk_size: rows held in memory at once
+    :return number of rows written
+    """
+    header = json.dumps({"columns": table.columns}).encode("utf-8")
+    fp.write(BINARY_MAGIC + struct.pack("<BI", BINARY_VERSION, len(header)) + header)
+    types = table.get_types()
+    count = 0
+    for chunk in iter_chunks(table.rows, chunk_size):
+        fp.write(struct.pack("<I", len(chunk)))
+        for values, col_type in zip(zip(*chunk), types):
+            fp.write(_encode_column(list(values), col_type))
+        count += len(chunk)
+    return count
+
+def read_binary(fp):
+    """
+    :param  fp: open binary file written by write_binary()
+    :return ExportTable whose rows are read one chunk at a time
+    """
+    magic = fp.read(len(BINARY_MAGIC))
+    version, header_len = struct.unpack("<BI", fp.read(5))
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise Exception(F"NOT a version {BINARY_VERSION} {BINARY} file!")
+    columns = [tuple(col) for col in json.loads(fp.read(header_len).decode("utf-8"))["columns"]]
+
+    def rows():
+        while True:
+            size = fp.read(4)
+            if len(size) < 4:
+                return
+            num_rows = struct.unpack("<I", size)[0]
+
+            def read_text() -> list:
+                data_len = struct.unpack("<I", fp.read(4))[0]
+                return fp.read(data_len).decode("utf-8").split(TEXT_SEP) if num_rows else []
+
+            values = []
+            for _, col_type in columns:
+                if col_type == COL_DATE:
+                    values.append([date.fromordinal(val) for val in _read_int64s(fp, num_rows)])
+                elif col_type == COL_DECIMAL:
+                    exponent = struct.unpack("<b", fp.read(1))[0]
+                    if exponent == DECIMAL_AS_TEXT:
+                        values.append([Decimal(val) for val in read_text()])
+                    else:
+                        values.append([Decimal((0 if val >= 0 else 1, tuple(map(int, str(abs(val)))), exponent))
+                                       for val in _read_int64s(fp, num_rows)])
+                else:
+                    values.append(read_text())
+            yield from zip(*values)
+    return ExportTable(columns, rows())
+
+def export_table(table:ExportTable, dest = None, p_format:str = CSV, chunk_size:int = DEFAULT_CHUNK,
+                 logger:lg.Logger = None) -> int:
+    """
+    stream a table to a file, never holding more than one chunk of rows in memory
+    :param       table: to write
+    :param        dest: file name or open file; default is stdout for CSV
+    :param    p_format: CSV or BINARY
+    :param  chunk_size: rows per chunk
+    :param      logger: optional
+    :return number of rows written
+    """
+    if p_format not in (CSV, BINARY):
+        raise Exception(F"BAD export format: {p_format}!")
+    writer = write_csv if p_format == CSV else write_binary
+    if dest is None:
+        if p_format == BINARY:
+            raise Exception(F"MUST have a destination for {BINARY} format!")
+        dest = stdout
+    if isinstance(dest, str):
+        with open(dest, "w", newline = "") if p_format == CSV else open(dest, "wb") as fp:
+            count = writer(table, fp, chunk_size)
+    else:
+        count = writer(table, dest, chunk_size)
+    if logger: logger.info(F"exported {count} rows in {p_format} format to {getattr(dest, 'name', dest)}")
+    return count
@@ -0,0 +1,155 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncLock.py
+#   -- locks to PREVENT threads AND processes from using the same Gnucash file at the same time
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import fcntl
+import os
+import threading
+from time import monotonic, sleep
+from sys import path
+path.append("/home/marksa/git/Python/utils")
+from mhsUtils import lg, osp, get_current_time
+
+LOCK_SUFFIX:str = ".pylock"
+# polling interval while waiting for another process, in seconds
+MIN_BACKOFF = 0.01
+MAX_BACKOFF = 0.25
+
+
+class _SharedLock:
+    """In-process lock that MANY readers OR one writer can hold."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+
+    def acquire(self, shared:bool, blocking:bool = True, timeout:float = None) -> bool:
+        with self._cond:
+            def available():
+                return not self._writer and (shared or self._readers == 0)
+            if not blocking:
+                if not available():
+                    return False
+            elif not self._cond.wait_for(available, timeout):
+                return False
+            if shared:
+                self._readers += 1
+            else:
+                self._writer = True
+            return True
+
+    def release(self, shared:bool):
+        with self._cond:
+            if shared:
+                self._readers -= 1
+            else:
+                self._writer = False
+            self._cond.notify_all()
+
+
+# ONE in-process lock per Gnucash file, shared by ALL the GncFileLock instances in this process
+_registry_lock = threading.Lock()
+_file_locks = {}
+
+def _get_registered_lock(p_lockfile:str) -> _SharedLock:
+    with _registry_lock:
+        lock = _file_locks.get(p_lockfile)
+        if lock is None:
+            lock = _SharedLock()
+            _file_locks[p_lockfile] = lock
+        return lock
+
+def get_book_path(p_gncfile:str) -> str:
+    """:return the file system path of a Gnucash file name or URI, e.g. 'sqlite3:///home/me/book.gnucash'"""
+    book = p_gncfile.split("://", 1)[1] if "://" in p_gncfile else p_gncfile
+    return osp.realpath(book)
+
+
+class GncFileLock:
+    """
+    Lock a Gnucash file against other threads of this process, through a module-level registry,
+    AND against other processes, through an fcntl lock on a file beside the Gnucash file.
+    """
+    def __init__(self, p_gncfile:str, p_logger:lg.Logger = None):
+        self._lgr = p_logger
+        self._lock_file = get_book_path(p_gncfile) + LOCK_SUFFIX
+        self._thread_lock = _get_registered_lock(self._lock_file)
+        self._fd = None
+        self._shared = False
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def __str__(self):
+        return F"{self.__class__.__name__}({self._lock_file}, held = {self.is_held()})"
+
+    def get_lock_file(self) -> str:
+        return self._lock_file
+
+    def is_held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, blocking:bool = True, timeout:float = None, shared:bool = False) -> bool:
+        """
+        :param  blocking: False to return immediately if the file is locked
+        :param   timeout: maximum seconds to wait if blocking; None to wait as long as necessary
+        :param    shared: True for a read lock that other readers can ALSO hold
+        :return True if the lock was acquired
+        """
+        if self._fd is not None:
+            raise Exception(F"lock '{self._lock_file}' is ALREADY held by this instance!")
+        deadline = None if timeout is None else monotonic() + timeout
+
+        if not self._thread_lock.acquire(shared, blocking, timeout):
+            if self._lgr: self._lgr.warning(F"could NOT get thread lock on '{self._lock_file}'")
+            return False
+
+        fd = os.open(self._lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        operation = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+        backoff = MIN_BACKOFF
+        while True:
+            try:
+                fcntl.flock(fd, operation)
+                break
+            except BlockingIOError:
+                remaining = None if deadline is None else deadline - monotonic()
+                if not blocking or (remaining is not None and remaining <= 0):
+                    os.close(fd)
+                    self._thread_lock.release(shared)
+                    if self._lgr: self._lgr.warning(F"'{self._lock_file}' is locked by another process")
+                    return False
+                sleep(backoff if remaining is None else min(backoff, remaining))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+        self._fd = fd
+        self._shared = shared
+        if self._lgr: self._lgr.info(F"Acquired '{self._lock_file}' {'shared' if shared else 'exclusive'} lock"
+                                     F" at {get_current_time()}")
+        return True
+
+    def try_acquire(self, shared:bool = False) -> bool:
+        """:return True if the lock was acquired WITHOUT waiting"""
+        return self.acquire(blocking = False, shared = shared)
+
+    def release(self):
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+        self._thread_lock.release(self._shared)
+        if self._lgr: self._lgr.info(F"released lock '{self._lock_file}' at {get_current_time()}")
@@ -0,0 +1,83 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncLog.py
+#   -- logging facade that formats messages ONLY when their level is enabled, with a quiet mode for hot loops
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.8+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+from contextlib import contextmanager
+from sys import path
+path.append("/home/marksa/git/Python/utils")
+from mhsUtils import lg
+
+# below DEBUG: for output that is expensive even when formatted lazily, e.g. writing out whole period lists
+TRACE = 5
+lg.addLevelName(TRACE, "TRACE")
+
+
+class LazyLogger(lg.LoggerAdapter):
+    """
+    Accepts the usual string messages AND callables returning the message, e.g.
+        lgr.debug(lambda: F"account = {acct.GetName()}")
+    which are called, along with any binding calls inside them, ONLY if the level is enabled.
+    In quiet mode ONLY warnings and errors get through.
+    """
+    def __init__(self, p_logger:lg.Logger, p_quiet:bool = False):
+        super().__init__(p_logger, {})
+        self._quiet = p_quiet
+
+    def isEnabledFor(self, level:int) -> bool:
+        if self._quiet and level < lg.WARNING:
+            return False
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg, kwargs):
+        """ONLY called by LoggerAdapter.log() once the level is known to be enabled"""
+        return (msg() if callable(msg) else msg), kwargs
+
+    # the hot path levels check quiet mode and the level BEFORE going through LoggerAdapter.log()
+    # and pass an extra stacklevel so the records show the caller of these methods, NOT this file
+    def trace(self, msg, *args, **kwargs):
+        if not self._quiet and self.logger.isEnabledFor(TRACE):
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+            self.logger.log(TRACE, msg() if callable(msg) else msg, *args, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        if not self._quiet and self.logger.isEnabledFor(lg.DEBUG):
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+            self.logger.debug(msg() if callable(msg) else msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        if not self._quiet and self.logger.isEnabledFor(lg.INFO):
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+            self.logger.info(msg() if callable(msg) else msg, *args, **kwargs)
+
+    def is_quiet(self) -> bool:
+        return self._quiet
+
+    def set_quiet(self, p_quiet:bool):
+        self._quiet = p_quiet
+
+    @contextmanager
+    def quiet(self):
+        """suppress debug and info messages in the enclosed block"""
+        previous = self._quiet
+        self._quiet = True
+        try:
+            yield self
+        finally:
+            self._quiet = previous
+
+
+def get_lazy_logger(p_logger, p_quiet:bool = False) -> LazyLogger:
+    """:return the logger if ALREADY a LazyLogger, else a LazyLogger wrapping it"""
+    if isinstance(p_logger, LazyLogger):
+        return p_logger
+    return LazyLogger(p_logger, p_quiet)
@@ -0,0 +1,119 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncMultiBook.py
+#   -- run the same report queries against several Gnucash files in parallel, one GnucashSession per worker process
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__          = "Mark Sattolo"
+__author_email__    = "epistemik@gmail.com"
+__gnucash_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from gncUtils import *
+
+# query types
+ASSETS:str   = "assets"
+SPLITS:str   = "splits"
+BALANCES:str = "balances"
+
+COMBINED:str = "COMBINED"
+ERRORS:str   = "ERRORS"
+
+
+def run_book_query(p_gncfile:str, p_query:str, p_args:tuple, p_level:int = lg.WARNING):
+    """
+    open ONE Gnucash file and run ONE query: called in a worker process
+    :param  p_gncfile: Gnucash file
+    :param    p_query: ASSETS: args = (asset accounts dict, date)
+                       SPLITS: args = (target path, period starts, periods)
+                       BALANCES: args = (dates, paths dict)
+    :param     p_args: arguments of the query
+    :param    p_level: log level for the worker
+    :return dict of item -> balance string for ASSETS, the filled period list for SPLITS, a BalanceMatrix for BALANCES
+    """
+    logger = lg.getLogger(F"{__name__}.{osp.basename(p_gncfile)}")
+    logger.setLevel(p_level)
+    # read-only so several workers and other report processes can read the same file at the same time
+    gnucash_session = GnucashSession(TEST, p_gncfile, TRADE, logger, p_read_only = True)
+    gnucash_session.begin_session()
+    try:
+        if p_query == ASSETS:
+            return gnucash_session.get_account_assets(p_args[0], p_args[1])
+        if p_query == SPLITS:
+            target_path, period_starts, periods = p_args
+            fill_splits(gnucash_session.get_root_acct(), target_path, period_starts, periods,
+                        stats = gnucash_session.get_stats())
+            return periods
+        if p_query == BALANCES:
+            return gnucash_session.get_balance_series(p_args[0], p_args[1])
+        raise Exception(F"BAD query: {p_query}!")
+    finally:
+        gnucash_session.end_session(False)
+
+def merge_results(p_query:str, p_results:list):
+    """
+    :param    p_query: type of the results
+    :param  p_results: results of the SAME query from several books
+    :return the sum of the results, in the same layout
+    """
+    if not p_results:
+        return None
+    if p_query == ASSETS:
+        merged = {}
+        for data in p_results:
+            for item, value in data.items():
+                merged[item] = merged.get(item, ZERO) + Decimal(value)
+        return {item: value.to_eng_string() for item, value in merged.items()}
+    if p_query == SPLITS:
+        merged = [list(period[:PERIOD_END + 1]) + [ZERO, ZERO, ZERO] for period in p_results[0]]
+        for periods in p_results:
+            for row, period in zip(merged, periods):
+                for col in (PERIOD_DEBIT, PERIOD_CREDIT, PERIOD_TOTAL):
+                    row[col] += period[col]
+        return merged
+    merged = BalanceMatrix(p_results[0].dates, p_results[0].items)
+    for matrix in p_results:
+        for item in matrix.items:
+            merged.add_to_column(item, matrix.get_column(item))
+    return merged
+
+def run_multi_book(p_files:list, p_query:str, p_args:tuple, p_logger:lg.Logger, max_workers:int = None,
+                   p_level:int = lg.WARNING) -> dict:
+    """
+    fan out the query to a process pool with one Gnucash file per task and merge the results
+    :param      p_files: Gnucash files
+    :param      p_query: ASSETS, SPLITS or BALANCES
+    :param       p_args: arguments of the query, see run_book_query()
+    :param     p_logger: for this process
+    :param  max_workers: default is the number of cores
+    :param      p_level: log level for the workers
+    :return dict of file -> result, plus COMBINED -> merged result of ALL the successful files and ERRORS -> file -> error
+    """
+    if p_query not in (ASSETS, SPLITS, BALANCES):
+        raise Exception(F"BAD query: {p_query}!")
+    p_logger.info(F"run '{p_query}' on {len(p_files)} files at {get_current_time()}")
+
+    results = {}
+    errors = {}
+    # the Gnucash engine is NOT fork-safe: start each worker with a fresh interpreter
+    with ProcessPoolExecutor(max_workers = max_workers, mp_context = multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(run_book_query, gnc_file, p_query, p_args, p_level): gnc_file for gnc_file in p_files}
+        for future in as_completed(futures):
+            gnc_file = futures[future]
+            try:
+                results[gnc_file] = future.result()
+                p_logger.info(F"finished '{gnc_file}' at {get_current_time()}")
+            except Exception as ex:
+                errors[gnc_file] = repr(ex)
+                p_logger.error(F"query on '{gnc_file}' FAILED: {repr(ex)}")
+
+    # keep the results in the order of the submitted files
+    ordered = {gnc_file: results[gnc_file] for gnc_file in p_files if gnc_file in results}
+    ordered[COMBINED] = merge_results(p_query, list(ordered.values()))
+    ordered[ERRORS] = errors
+    return ordered
@@ -0,0 +1,220 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncPeriods.py
+#   -- period calendars and bucketing of split columns into ANY set of periods, including overlapping windows
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+from bisect import bisect_left
+from datetime import timedelta
+from gncSplits import *
+from sys import path
+path.append("/home/marksa/git/Python/utils")
+from mhsUtils import ONE_DAY
+
+
+def _month_start(p_year:int, p_month:int) -> date:
+    """:return first day of the month, p_month can be < 1 or > 12"""
+    year, month = divmod(p_year * 12 + p_month - 1, 12)
+    return date(year, month + 1, 1)
+
+def _months_from(p_date:date, p_months:int) -> date:
+    """:return first day of the month p_months after the month of p_date"""
+    return _month_start(p_date.year, p_date.month + p_months)
+
+
+class PeriodCalendar:
+    """
+    Start date, inclusive end date and label of each period.
+    Periods may overlap or leave gaps, e.g. rolling windows, and are bucketed WITHOUT re-scanning the splits.
+    """
+    def __init__(self, p_starts:list, p_ends:list, p_labels:list = None):
+        if len(p_starts) != len(p_ends):
+            raise Exception(F"Mismatched periods: {len(p_starts)} starts and {len(p_ends)} ends!")
+        if any(end < start for start, end in zip(p_starts, p_ends)):
+            raise Exception("period ends CANNOT be before their starts!")
+        self.starts = list(p_starts)
+        self.ends = list(p_ends)
+        self.labels = list(p_labels) if p_labels else [F"{start.isoformat()}..{end.isoformat()}"
+                                                       for start, end in zip(self.starts, self.ends)]
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def monthly(cls, p_first:date, p_last:date):
+        """:return the calendar months from the month of p_first to the month of p_last"""
+        starts = []
+        start = _months_from(p_first, 0)
+        while start <= p_last:
+            starts.append(start)
+            start = _months_from(start, 1)
+        return cls(starts, [_months_from(start, 1) - ONE_DAY for start in starts],
+                   [start.strftime("%Y-%m") for start in starts])
+
+    @classmethod
+    def quarterly(cls, p_first:date, p_last:date, p_start_month:int = 1):
+        """
+        :param  p_start_month: first month of the (fiscal) year: quarters are numbered from it
+        :return the quarters that include p_first through p_last
+        """
+        offset = (p_first.month - p_start_month) % 3
+        start = _months_from(p_first, -offset)
+        starts = []
+        while start <= p_last:
+            starts.append(start)
+            start = _months_from(start, 3)
+        labels = []
+        for start in starts:
+            months_in = (start.month - p_start_month) % 12
+            # fiscal years are named for the calendar year they END in
+            year = start.year + (1 if p_start_month > 1 and start.month >= p_start_month else 0)
+            labels.append(F"{year}-Q{months_in // 3 + 1}")
+        return cls(starts, [_months_from(start, 3) - ONE_DAY for start in starts], labels)
+
+    @classmethod
+    def yearly(cls, p_first:date, p_last:date, p_start_month:int = 1, p_start_day:int = 1):
+        """
+        :param  p_start_month, p_start_day: start of the (fiscal) year, e.g. 4, 1 for April 1: NOT February 29
+        :return the years that include p_first through p_last, fiscal years named for the calendar year they END in
+        """
+        if (p_start_month, p_start_day) == (2, 29):
+            raise Exception("a year CANNOT start on February 29: use March 1!")
+        year = p_first.year if (p_first.month, p_first.day) >= (p_start_month, p_start_day) else p_first.year - 1
+        starts = []
+        while date(year, p_start_month, p_start_day) <= p_last:
+            starts.append(date(year, p_start_month, p_start_day))
+            year += 1
+        ends = [date(start.year + 1, p_start_month, p_start_day) - ONE_DAY for start in starts]
+        labels = [str(end.year) if (p_start_month, p_start_day) == (1, 1) else F"FY{end.year}" for end in ends]
+        return cls(starts, ends, labels)
+
+    @classmethod
+    def rolling(cls, p_first_end:date, p_last_end:date, p_months:int, p_step_months:int = 1):
+        """
+        overlapping windows of p_months whole months, e.g. trailing twelve months, ending at month ends
+        :param  p_first_end: a date in the month of the first window end
+        :param   p_last_end: a date in the month of the last window end
+        """
+        if p_months < 1 or p_step_months < 1:
+            raise Exception(F"window of {p_months} months and step of {p_step_months} months MUST both be at least 1!")
+        starts, ends = [], []
+        end_month = _months_from(p_first_end, 0)
+        while end_month <= p_last_end:
+            starts.append(_months_from(end_month, 1 - p_months))
+            ends.append(_months_from(end_month, 1) - ONE_DAY)
+            end_month = _months_from(end_month, p_step_months)
+        return cls(starts, ends, [F"{p_months}M to {end.isoformat()}" for end in ends])
+
+    @classmethod
+    def rolling_days(cls, p_first_end:date, p_last_end:date, p_days:int, p_step_days:int = 1):
+        """overlapping windows of p_days days ending on p_first_end, then every p_step_days until p_last_end"""
+        if p_days < 1 or p_step_days < 1:
+            raise Exception(F"window of {p_days} days and step of {p_step_days} days MUST both be at least 1!")
+        ends = []
+        end = p_first_end
+        while end <= p_last_end:
+            ends.append(end)
+            end += timedelta(days = p_step_days)
+        return cls([end - timedelta(days = p_days - 1) for end in ends], ends,
+                   [F"{p_days}D to {end.isoformat()}" for end in ends])
+
+    @classmethod
+    def from_periods(cls, p_periods:list):
+        """:param  p_periods: [start, end, ...] rows as used by gncUtils.fill_splits()"""
+        return cls([period[PERIOD_START] for period in p_periods], [period[PERIOD_END] for period in p_periods])
+
+    def to_periods(self) -> tuple:
+        """:return (period starts, period list) for gncUtils.get_splits() and fill_splits()"""
+        return list(self.starts), [[start, end, ZERO, ZERO, ZERO] for start, end in zip(self.starts, self.ends)]
+
+    def bucket(self, p_dates, p_amounts:list, p_sorted:bool = False):
+        """
+        ONE pass over the splits builds prefix sums, then each period is two binary searches and a subtraction,
+        so overlapping periods cost NO extra pass over the splits
+        :param     p_dates: date ordinal of each split
+        :param   p_amounts: Decimal amount of each split
+        :param    p_sorted: True if the splits are ALREADY in date order
+        :return PeriodSums
+        """
+        if p_sorted:
+            dates, amounts = p_dates, p_amounts
+        else:
+            order = sorted(range(len(p_dates)), key = p_dates.__getitem__)
+            dates = [p_dates[i] for i in order]
+            amounts = [p_amounts[i] for i in order]
+
+        cum_debits, cum_credits, cum_totals = [ZERO], [ZERO], [ZERO]
+        debit = credit = ZERO
+        for amount in amounts:
+            # if the amount is negative this is a credit, else a debit
+            if amount < ZERO:
+                credit += amount
+            else:
+                debit += amount
+            cum_debits.append(debit)
+            cum_credits.append(credit)
+            cum_totals.append(debit + credit)
+
+        sums = PeriodSums(self)
+        for start, end in zip(self.starts, self.ends):
+            low = bisect_left(dates, start.toordinal())
+            high = bisect_right(dates, end.toordinal(), low)
+            sums.debits.append(cum_debits[high] - cum_debits[low])
+            sums.credits.append(cum_credits[high] - cum_credits[low])
+            sums.totals.append(cum_totals[high] - cum_totals[low])
+            sums.counts.append(high - low)
+        return sums
+
+    def bucket_columns(self, p_columns:SplitColumns):
+        """:return PeriodSums of ALL the splits in the columns"""
+        return self.bucket(p_columns.dates, p_columns.amounts)
+
+    def bucket_accounts(self, p_columns:SplitColumns) -> dict:
+        """:return dict of account name -> PeriodSums of its splits"""
+        dates = {acct_id: [] for acct_id in range(len(p_columns.names))}
+        amounts = {acct_id: [] for acct_id in range(len(p_columns.names))}
+        for ordinal, acct_id, amount in zip(p_columns.dates, p_columns.accounts, p_columns.amounts):
+            dates[acct_id].append(ordinal)
+            amounts[acct_id].append(amount)
+        return {name: self.bucket(dates[acct_id], amounts[acct_id]) for acct_id, name in enumerate(p_columns.names)}
+
+
+class PeriodSums:
+    """Debit, credit and total sums and the number of splits in each period of a PeriodCalendar."""
+    def __init__(self, p_calendar:PeriodCalendar):
+        self.calendar = p_calendar
+        self.debits  = []
+        self.credits = []
+        self.totals  = []
+        self.counts  = []
+
+    def __len__(self):
+        return len(self.calendar)
+
+    def get_period(self, p_label:str) -> dict:
+        """:return dict of start, end, debit, credit, total and count for the labelled period"""
+        index = self.calendar.labels.index(p_label)
+        return {"start": self.calendar.starts[index], "end": self.calendar.ends[index], "debit": self.debits[index],
+                "credit": self.credits[index], "total": self.totals[index], "count": self.counts[index]}
+
+    def to_periods(self, periods:list = None) -> list:
+        """
+        compatibility view: the sums as the period list used by fill_splits
+        :param  periods: optional [start, end, debits, credits, total] rows to ADD the sums to
+        :return the period list
+        """
+        if periods is None:
+            periods = [[start, end, ZERO, ZERO, ZERO] for start, end in zip(self.calendar.starts, self.calendar.ends)]
+        for row, debit, credit, total in zip(periods, self.debits, self.credits, self.totals):
+            row[PERIOD_DEBIT]  += debit
+            row[PERIOD_CREDIT] += credit
+            row[PERIOD_TOTAL]  += total
+        return periods
@@ -0,0 +1,512 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncSplits.py
+#   -- columnar storage, period aggregation and on-disk caching of the splits from a tree of Gnucash accounts
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import hashlib
+import os
+import pickle
+import sqlite3
+from array import array
+from bisect import bisect_right
+from datetime import date
+from sys import path
+path.append("/home/marksa/git/Python/utils")
+from mhsUtils import Decimal, ZERO, lg, osp
+
+# column offsets in the rows of a period list
+PERIOD_START  = 0
+PERIOD_END    = 1
+PERIOD_DEBIT  = 2
+PERIOD_CREDIT = 3
+PERIOD_TOTAL  = 4
+
+# Gnucash account full names
+ACCOUNT_SEPARATOR = ':'
+ROOT_NAME = ""
+
+
+class SplitColumns:
+    """Compact columns of (date, amount, account) triples for the splits of one or more accounts."""
+    def __init__(self):
+        self.dates = array('l')     # proleptic Gregorian ordinal of the transaction date
+        self.accounts = array('I')  # index into self.names
+        self.amounts = []           # Decimal amount of each split
+        self.names = []             # account names in the order they were added
+        self._name_ids = {}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def add_account(self, p_name:str) -> int:
+        """
+        :param  p_name: unique account name, e.g. full name
+        :return index of the account in the account column
+        """
+        acct_id = self._name_ids.get(p_name)
+        if acct_id is None:
+            acct_id = len(self.names)
+            self._name_ids[p_name] = acct_id
+            self.names.append(p_name)
+        return acct_id
+
+    def get_account_id(self, p_name:str) -> int:
+        return self._name_ids.get(p_name, -1)
+
+    def append(self, p_date:date, p_amount:Decimal, p_acct_id:int):
+        self.dates.append(p_date.toordinal())
+        self.amounts.append(p_amount)
+        self.accounts.append(p_acct_id)
+
+    def extend(self, p_dates:list, p_amounts:list, p_acct_id:int):
+        """
+        add the splits of ONE account
+        :param     p_dates: transaction dates
+        :param   p_amounts: Decimal split amounts, same length as p_dates
+        :param   p_acct_id: from add_account()
+        """
+        if len(p_dates) != len(p_amounts):
+            raise Exception(F"Mismatched split columns: {len(p_dates)} dates and {len(p_amounts)} amounts!")
+        self.dates.extend(d.toordinal() for d in p_dates)
+        self.amounts.extend(p_amounts)
+        self.accounts.extend([p_acct_id] * len(p_dates))
+
+    def date_order(self) -> list:
+        """:return indices of the splits sorted by date"""
+        return sorted(range(len(self.dates)), key = self.dates.__getitem__)
+
+
+class SplitAggregate:
+    """Debit, credit and total sums per period for each account and rolled-up for all the accounts."""
+    def __init__(self, p_names:list, p_starts:list, p_ends:list):
+        self.names = list(p_names)
+        self.period_starts = list(p_starts)
+        self.period_ends = list(p_ends)
+        num_periods = len(p_starts)
+        self.debits  = [[ZERO] * num_periods for _ in self.names]
+        self.credits = [[ZERO] * num_periods for _ in self.names]
+        self.totals  = [[ZERO] * num_periods for _ in self.names]
+
+    def __len__(self):
+        return len(self.period_starts)
+
+    def get_account(self, p_name:str) -> dict:
+        """:return dict of debit, credit and total lists for the named account"""
+        index = self.names.index(p_name)
+        return {"debits": self.debits[index], "credits": self.credits[index], "totals": self.totals[index]}
+
+    def rollup(self) -> dict:
+        """:return dict of debit, credit and total lists summed over ALL the accounts"""
+        return {
+            "debits"  : [sum(col, ZERO) for col in zip(*self.debits)]  if self.names else [ZERO] * len(self) ,
+            "credits" : [sum(col, ZERO) for col in zip(*self.credits)] if self.names else [ZERO] * len(self) ,
+            "totals"  : [sum(col, ZERO) for col in zip(*self.totals)]  if self.names else [ZERO] * len(self)
+        }
+
+    def to_periods(self, periods:list = None) -> list:
+        """
+        compatibility view: the rolled-up sums as the period list used by fill_splits
+        :param  periods: optional [start, end, debits, credits, total] rows to ADD the sums to
+        :return the period list
+        """
+        if periods is None:
+            periods = [[start, end, ZERO, ZERO, ZERO] for start, end in zip(self.period_starts, self.period_ends)]
+        rolled = self.rollup()
+        for row, debit, credit, total in zip(periods, rolled["debits"], rolled["credits"], rolled["totals"]):
+            row[PERIOD_DEBIT]  += debit
+            row[PERIOD_CREDIT] += credit
+            row[PERIOD_TOTAL]  += total
+        return periods
+
+
+def aggregate_splits(columns:SplitColumns, period_starts:list, period_ends:list) -> SplitAggregate:
+    """
+    bucket ALL the splits into contiguous periods with ONE sorted sweep instead of a binary search per split
+    :param        columns: splits to aggregate
+    :param  period_starts: sorted start date of each period
+    :param    period_ends: end date of each period, inclusive
+    :return debit/credit/total sums per account and period
+    """
+    result = SplitAggregate(columns.names, period_starts, period_ends)
+    num_periods = len(period_starts)
+    if num_periods == 0 or len(columns) == 0:
+        return result
+
+    starts = [d.toordinal() for d in period_starts]
+    ends = [d.toordinal() for d in period_ends]
+    first_start = starts[0]
+    last_end = ends[-1]
+    dates = columns.dates
+    amounts = columns.amounts
+    accounts = columns.accounts
+    debits = result.debits
+    credits = result.credits
+    totals = result.totals
+
+    index = 0
+    for split in columns.date_order():
+        trans_date = dates[split]
+        # ignore transactions before the first period start
+        if trans_date < first_start:
+            continue
+        # splits are in date order so NO need to search past the last period end
+        if trans_date > last_end:
+            break
+        # advance to the last period that starts on or before the transaction date
+        while index + 1 < num_periods and starts[index + 1] <= trans_date:
+            index += 1
+        # ignore transactions in a gap between periods
+        if trans_date > ends[index]:
+            continue
+
+        amount = amounts[split]
+        acct = accounts[split]
+        # if the amount is negative this is a credit, else a debit
+        if amount < ZERO:
+            credits[acct][index] += amount
+        else:
+            debits[acct][index] += amount
+        totals[acct][index] += amount
+
+    return result
+
+
+def tree_lookup_by_name(p_children:dict, p_parent:str, p_name:str) -> str:
+    """
+    same search as Gnucash Account.lookup_by_name(): the children first, then the descendants of each child
+    :param  p_children: full name -> list of child full names
+    :param    p_parent: full name of the account to search under
+    :param      p_name: name of the account to find
+    :return full name of the matching account or None
+    """
+    children = p_children.get(p_parent, [])
+    for child in children:
+        if child.rpartition(ACCOUNT_SEPARATOR)[2] == p_name:
+            return child
+    for child in children:
+        found = tree_lookup_by_name(p_children, child, p_name)
+        if found is not None:
+            return found
+    return None
+
+def tree_account_from_path(p_children:dict, p_path:list, p_top:str = ROOT_NAME) -> str:
+    """
+    :param  p_children: full name -> list of child full names
+    :param      p_path: path to follow, as for gncUtils.account_from_path()
+    :param       p_top: full name of the base account
+    :return full name of the requested account
+    """
+    acct = p_top
+    for acct_name in p_path:
+        acct = tree_lookup_by_name(p_children, acct, acct_name)
+        if acct is None:
+            raise Exception(F"Path '{str(p_path)}' could NOT be found!")
+    return acct
+
+def tree_descendants(p_children:dict, p_name:str) -> list:
+    """:return full names of ALL the descendants of the account, each parent BEFORE its children"""
+    descendants = []
+    for child in p_children.get(p_name, []):
+        descendants.append(child)
+        descendants.extend(tree_descendants(p_children, child))
+    return descendants
+
+
+# EVERY row that affects the cached accounts or splits, in a fixed order: moving a split to another account,
+# or renaming or reparenting an account, changes the hash even when the counts and sums do NOT change
+SQL_FINGERPRINT_QUERIES = (
+    "SELECT guid, name, parent_guid, commodity_guid FROM accounts ORDER BY guid" ,
+    "SELECT guid, post_date, enter_date FROM transactions ORDER BY guid" ,
+    "SELECT guid, tx_guid, account_guid, quantity_num, quantity_denom, value_num, value_denom FROM splits ORDER BY guid" ,
+    "SELECT guid, commodity_guid, currency_guid, date, value_num, value_denom FROM prices ORDER BY guid"
+)
+
+def file_version(p_file:str) -> tuple:
+    """
+    cheap check for changes, NO table scans
+    :param  p_file: path to a Gnucash file
+    :return (modification time in ns, size, SQLite file change counter or None, write-ahead log stat or None)
+    """
+    stat = os.stat(p_file)
+    with open(p_file, "rb") as fp:
+        header = fp.read(28)
+    # the change counter in the SQLite header is incremented by EVERY write transaction, except in WAL mode
+    counter = header[24:28] if header[:16] == b"SQLite format 3\x00" else None
+    wal_file = p_file + "-wal"
+    wal = None
+    if counter is not None and osp.isfile(wal_file):
+        wal_stat = os.stat(wal_file)
+        wal = wal_stat.st_mtime_ns, wal_stat.st_size
+    return stat.st_mtime_ns, stat.st_size, counter, wal
+
+def file_fingerprint(p_file:str) -> tuple:
+    """
+    :param  p_file: path to a Gnucash file
+    :return for SQLite books: (number of rows, hash of the rows) of the account, transaction, split and price tables;
+            otherwise (modification time in ns, size)
+    """
+    with open(p_file, "rb") as fp:
+        is_sqlite = fp.read(16) == b"SQLite format 3\x00"
+    if is_sqlite:
+        conn = sqlite3.connect(F"file:{p_file}?mode=ro", uri = True)
+        try:
+            # ONE read transaction so ALL the queries see the same version of the book
+            conn.execute("BEGIN")
+            digest = hashlib.sha1()
+            count = 0
+            for query in SQL_FINGERPRINT_QUERIES:
+                for row in conn.execute(query):
+                    digest.update(repr(row).encode("utf-8"))
+                    count += 1
+            return count, digest.hexdigest()
+        finally:
+            conn.close()
+    stat = os.stat(p_file)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SplitCache:
+    """
+    Persistent copy of the account tree and ALL the splits of a Gnucash file,
+    valid as long as the Gnucash file has the same fingerprint.
+    The fingerprint is ONLY recomputed when the file version changes, so checking validity is cheap.
+    """
+    CACHE_VERSION = 2
+
+    def __init__(self, p_gncfile:str, p_folder:str, p_logger:lg.Logger = None):
+        self._lgr = p_logger
+        self._gnc_file = p_gncfile
+        self._cache_file = osp.join(p_folder, osp.basename(p_gncfile) + ".splits")
+        self._fingerprint = None
+        self._checked_version = None  # file version at the last fingerprint check
+        self._checked_valid = False   # result of that check
+        self.clear()
+
+    def clear(self):
+        self.columns = SplitColumns()
+        self._children = {}    # full name -> list of child full names
+        self._commodity = {}   # full name -> 'namespace:mnemonic'
+        self._offsets = {}     # full name -> (start, end) of the date-sorted splits of the account
+        self._prefix = {}      # full name -> cumulative sums of the split amounts, computed on demand
+
+    def get_cache_file(self) -> str:
+        return self._cache_file
+
+    def get_gnc_file(self) -> str:
+        return self._gnc_file
+
+    def is_valid(self) -> bool:
+        """:return True if the cache holds the splits of the CURRENT version of the Gnucash file"""
+        if self._fingerprint is None or not osp.isfile(self._gnc_file):
+            return False
+        version = file_version(self._gnc_file)
+        if version != self._checked_version:
+            self._checked_valid = self._fingerprint == file_fingerprint(self._gnc_file)
+            self._checked_version = version
+        return self._checked_valid
+
+    def add_account(self, p_name:str, p_parent:str, p_commodity:str, p_dates:list, p_amounts:list):
+        """
+        add ONE account and its splits: parents MUST be added before their children
+        :param         p_name: full name of the account
+        :param       p_parent: full name of the parent account or None for the root
+        :param    p_commodity: 'namespace:mnemonic' of the account commodity
+        :param        p_dates: transaction date of each split
+        :param      p_amounts: Decimal amount of each split
+        """
+        order = sorted(range(len(p_dates)), key = p_dates.__getitem__)
+        start = len(self.columns)
+        self.columns.extend([p_dates[i] for i in order], [p_amounts[i] for i in order], self.columns.add_account(p_name))
+        self._offsets[p_name] = (start, len(self.columns))
+        self._commodity[p_name] = p_commodity
+        self._children[p_name] = []
+        if p_parent is not None:
+            self._children[p_parent].append(p_name)
+
+    def set_fingerprint(self, p_fingerprint:tuple = None, p_version:tuple = None):
+        """
+        :param  p_fingerprint: of the Gnucash file the splits were read from; default is the current one
+        :param      p_version: file version taken BEFORE the fingerprint, if known
+        """
+        if p_fingerprint is None:
+            p_version = file_version(self._gnc_file)
+            p_fingerprint = file_fingerprint(self._gnc_file)
+        self._fingerprint = p_fingerprint
+        self._checked_version, self._checked_valid = p_version, p_version is not None
+
+    def save(self):
+        os.makedirs(osp.dirname(self._cache_file), exist_ok = True)
+        data = {
+            "version"     : self.CACHE_VERSION ,
+            "fingerprint" : self._fingerprint ,
+            "names"       : self.columns.names ,
+            "dates"       : self.columns.dates.tobytes() ,
+            "accounts"    : self.columns.accounts.tobytes() ,
+            "amounts"     : [str(amt) for amt in self.columns.amounts] ,
+            "children"    : self._children ,
+            "commodity"   : self._commodity ,
+            "offsets"     : self._offsets
+        }
+        # write to a temp file then rename so readers NEVER see a partial cache
+        temp_file = self._cache_file + ".tmp"
+        with open(temp_file, "wb") as fp:
+            pickle.dump(data, fp, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, self._cache_file)
+        if self._lgr: self._lgr.info(F"saved {len(self.columns)} splits to cache '{self._cache_file}'")
+
+    def load(self) -> bool:
+        """:return True if a cache file for the CURRENT version of the Gnucash file was loaded"""
+        self.clear()
+        self._fingerprint = None
+        self._checked_version = None
+        if not osp.isfile(self._cache_file) or not osp.isfile(self._gnc_file):
+            return False
+        try:
+            with open(self._cache_file, "rb") as fp:
+                data = pickle.load(fp)
+        except Exception as ex:
+            if self._lgr: self._lgr.warning(F"could NOT read cache '{self._cache_file}': {repr(ex)}")
+            return False
+        version = file_version(self._gnc_file)
+        if data.get("version") != self.CACHE_VERSION or data.get("fingerprint") != file_fingerprint(self._gnc_file):
+            if self._lgr: self._lgr.info(F"cache '{self._cache_file}' is STALE")
+            return False
+
+        for name in data["names"]:
+            self.columns.add_account(name)
+        self.columns.dates.frombytes(data["dates"])
+        self.columns.accounts.frombytes(data["accounts"])
+        self.columns.amounts = [Decimal(amt) for amt in data["amounts"]]
+        self._children = data["children"]
+        self._commodity = data["commodity"]
+        self._offsets = data["offsets"]
+        self._fingerprint = data["fingerprint"]
+        self._checked_version, self._checked_valid = version, True
+        if self._lgr: self._lgr.info(F"loaded {len(self.columns)} splits from cache '{self._cache_file}'")
+        return True
+
+    def lookup_by_name(self, p_parent:str, p_name:str) -> str:
+        return tree_lookup_by_name(self._children, p_parent, p_name)
+
+    def account_from_path(self, p_path:list, p_top:str = ROOT_NAME) -> str:
+        """
+        :param  p_path: path to follow, as for gncUtils.account_from_path()
+        :param   p_top: full name of the base account
+        :return full name of the requested account
+        """
+        return tree_account_from_path(self._children, p_path, p_top)
+
+    def get_descendants(self, p_name:str) -> list:
+        return tree_descendants(self._children, p_name)
+
+    def get_commodity(self, p_name:str) -> str:
+        return self._commodity.get(p_name)
+
+    def get_account_splits(self, p_name:str) -> tuple:
+        """:return (dates, amounts) of the account, sorted by date"""
+        start, end = self._offsets[p_name]
+        return self.columns.dates[start:end], self.columns.amounts[start:end]
+
+    def get_subtree_columns(self, p_name:str) -> SplitColumns:
+        """:return new columns with the splits of the account and ALL its descendants"""
+        columns = SplitColumns()
+        for name in [p_name] + self.get_descendants(p_name):
+            start, end = self._offsets[name]
+            acct_id = columns.add_account(name)
+            columns.dates.extend(self.columns.dates[start:end])
+            columns.amounts.extend(self.columns.amounts[start:end])
+            columns.accounts.extend([acct_id] * (end - start))
+        return columns
+
+    def get_account_balance(self, p_name:str, p_date:date) -> Decimal:
+        """:return sum of the split amounts of the account on or before the date, in the account commodity"""
+        prefix = self._prefix.get(p_name)
+        if prefix is None:
+            prefix = [ZERO]
+            running = ZERO
+            for amount in self.get_account_splits(p_name)[1]:
+                running += amount
+                prefix.append(running)
+            self._prefix[p_name] = prefix
+        start, end = self._offsets[p_name]
+        return prefix[bisect_right(self.columns.dates, p_date.toordinal(), start, end) - start]
+
+    def get_total_balance(self, p_path:list, p_date:date, p_currency:str) -> Decimal:
+        """
+        :param      p_path: path to the account from the root
+        :param      p_date: to get the balance
+        :param  p_currency: 'namespace:mnemonic' of the currency
+        :return total balance of the account and its descendants OR None if any account is NOT in the currency
+        """
+        acct = self.account_from_path(p_path)
+        names = [acct] + self.get_descendants(acct)
+        if any(self._commodity[name] != p_currency for name in names):
+            return None
+        return sum((self.get_account_balance(name, p_date) for name in names), ZERO)
+
+    def fill_splits(self, p_path:list, period_starts:list, periods:list, p_top:str = ROOT_NAME) -> str:
+        """
+        same as gncUtils.fill_splits() but using ONLY the cached splits
+        :return full name of the target account
+        """
+        acct = self.account_from_path(p_path, p_top)
+        columns = self.get_subtree_columns(acct)
+        aggregate_splits(columns, period_starts, [period[PERIOD_END] for period in periods]).to_periods(periods)
+        return acct
+
+
+def running_balances(p_dates, p_amounts:list, query_dates:list) -> list:
+    """
+    balance after each query date from ONE sweep of the running sum of the split amounts
+    :param      p_dates: date ordinal of each split, sorted ascending
+    :param    p_amounts: Decimal amount of each split
+    :param  query_dates: sorted dates on which to get the balance, inclusive
+    :return Decimal balance for each query date
+    """
+    result = []
+    running = ZERO
+    index = 0
+    num_splits = len(p_dates)
+    for query_date in query_dates:
+        limit = query_date.toordinal()
+        while index < num_splits and p_dates[index] <= limit:
+            running += p_amounts[index]
+            index += 1
+        result.append(running)
+    return result
+
+
+class BalanceMatrix:
+    """Balances of a set of items, e.g. asset groups, on each of a list of dates."""
+    def __init__(self, p_dates:list, p_items:list):
+        self.dates = list(p_dates)
+        self.items = list(p_items)
+        self._rows = {d: i for i, d in enumerate(self.dates)}
+        self._cols = {item: i for i, item in enumerate(self.items)}
+        self.values = [[ZERO] * len(self.items) for _ in self.dates]
+
+    def add_to_column(self, p_item:str, p_balances:list):
+        """:param  p_balances: balance for EACH date, to add to the item"""
+        col = self._cols[p_item]
+        for row, balance in zip(self.values, p_balances):
+            row[col] += balance
+
+    def get(self, p_date:date, p_item:str) -> Decimal:
+        return self.values[self._rows[p_date]][self._cols[p_item]]
+
+    def get_column(self, p_item:str) -> list:
+        col = self._cols[p_item]
+        return [row[col] for row in self.values]
+
+    def get_row(self, p_date:date) -> dict:
+        """:return same layout as GnucashSession.get_account_assets(): item -> balance string"""
+        return {item: value.to_eng_string() for item, value in zip(self.items, self.values[self._rows[p_date]])}
@@ -0,0 +1,147 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# gncStats.py
+#   -- counters and monotonic-clock timing histograms for the hot paths of a GnucashSession
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import json
+import os
+from contextlib import contextmanager
+from time import perf_counter
+from sys import path
+path.append("/home/marksa/git/Python/utils")
+from mhsUtils import osp, get_current_time
+
+# names of the instrumented operations
+STAT_SESSION_OPEN:str = "session open"
+STAT_SESSION_SAVE:str = "session save"
+STAT_SESSION_END:str  = "session end"
+STAT_INDEX_BUILD:str  = "account index build"
+STAT_SPLIT_LIST:str   = "GetSplitList"
+STAT_BALANCE:str      = "GetBalanceAsOfDate"
+STAT_INDEX_LOOKUP:str = "account index lookup"  # dict hits in the AccountIndex, NOT binding calls
+STAT_CONVERT:str      = "currency conversion"
+STAT_AMOUNTS:str      = "GetAmount to decimal"  # the GetAmount binding calls AND the conversion to Decimal
+STAT_TX_COMMIT:str    = "transaction commit"
+STAT_PRICE_COMMIT:str = "price commit"
+
+
+class Histogram:
+    """Durations in power-of-two microsecond buckets, plus the count, total, minimum and maximum."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = {}  # bucket -> count, bucket b holds durations under 2**b microseconds
+
+    def add(self, p_seconds:float):
+        self.count += 1
+        self.total += p_seconds
+        if self.min is None or p_seconds < self.min:
+            self.min = p_seconds
+        if self.max is None or p_seconds > self.max:
+            self.max = p_seconds
+        bucket = int(p_seconds * 1000000).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def get_mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_json(self) -> dict:
+        return {
+            "count" : self.count ,
+            "total" : self.total ,
+            "mean"  : self.get_mean() ,
+            "min"   : self.min ,
+            "max"   : self.max ,
+            "buckets (< usec)" : {str(2 ** bucket): num for bucket, num in sorted(self.buckets.items())}
+        }
+
+
+class SessionStats:
+    """
+    Per-session counters and timing histograms, from a monotonic clock.
+    A disabled instance ignores everything so the hot paths can call it unconditionally.
+    """
+    def __init__(self, p_enabled:bool = True):
+        self._enabled = p_enabled
+        self._counters = {}
+        self._timings = {}
+        self._created = get_current_time()
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    def reset(self):
+        self._counters.clear()
+        self._timings.clear()
+
+    def count(self, p_name:str, p_num:int = 1):
+        if self._enabled:
+            self._counters[p_name] = self._counters.get(p_name, 0) + p_num
+
+    def record(self, p_name:str, p_seconds:float):
+        if self._enabled:
+            hist = self._timings.get(p_name)
+            if hist is None:
+                hist = Histogram()
+                self._timings[p_name] = hist
+            hist.add(p_seconds)
+
+    @contextmanager
+    def timer(self, p_name:str):
+        """time the enclosed block"""
+        if not self._enabled:
+            yield
+            return
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(p_name, perf_counter() - start)
+
+    def timed(self, p_name:str, p_func, *args):
+        """:return p_func(*args), timed: for binding calls inside expressions"""
+        if not self._enabled:
+            return p_func(*args)
+        start = perf_counter()
+        try:
+            return p_func(*args)
+        finally:
+            self.record(p_name, perf_counter() - start)
+
+    def get_counter(self, p_name:str) -> int:
+        return self._counters.get(p_name, 0)
+
+    def get_histogram(self, p_name:str) -> Histogram:
+        return self._timings.get(p_name)
+
+    def to_json(self) -> dict:
+        return {
+            "created"  : self._created ,
+            "dumped"   : get_current_time() ,
+            "counters" : dict(sorted(self._counters.items())) ,
+            "timings"  : {name: hist.to_json() for name, hist in sorted(self._timings.items())}
+        }
+
+    def dump(self, p_file:str):
+        """write the stats as json, via a temporary file so readers NEVER see a partial file"""
+        folder = osp.dirname(p_file)
+        if folder:
+            os.makedirs(folder, exist_ok = True)
+        tmp_file = p_file + ".tmp"
+        with open(tmp_file, "w") as fp:
+            json.dump(self.to_json(), fp, indent = 4)
+        os.replace(tmp_file, p_file)
+
+# shared by the module functions when NO stats are passed
+NO_STATS = SessionStats(False)
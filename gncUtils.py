@@ -12,22 +12,72 @@ __author__          = "Mark Sattolo"
 __author_email__    = "epistemik@gmail.com"
 __gnucash_version__ = "3.6+"
 __created__ = "2019-04-07"
-__updated__ = "2024-12-22"
+__updated__ = "2026-10-17"
 
-import threading
 from datetime import date
-from sys import stdout, path
+from decimal import ROUND_HALF_EVEN
+from sys import path
 from bisect import bisect_right
-from math import log10
 from copy import copy
-import csv
+from functools import lru_cache
 from gnucash import GncNumeric, GncCommodity, GncPrice, Account, Session, Split, Transaction
 from gnucash.gnucash_core_c import CREC
+try:
+    # Gnucash 4+
+    from gnucash import SessionOpenMode
+except ImportError:
+    SessionOpenMode = None
 path.append("/home/marksa/git/Python/utils")
 from mhsUtils import Decimal, ZERO, ONE_DAY, BASE_DEV_FOLDER
 from investment import *
+from gncSplits import *
+from gncExport import *
+from gncLock import GncFileLock, get_book_path
+from fundRegistry import is_money_market
+from gncStats import *
+from gncLog import TRACE, LazyLogger, get_lazy_logger
+from gncBalances import BalanceStore
+from gncPeriods import PeriodCalendar, PeriodSums
 
 BASE_GNUCASH_FOLDER = osp.join(BASE_DEV_FOLDER, "Gnucash")
+SPLIT_CACHE_FOLDER  = osp.join(BASE_GNUCASH_FOLDER, "cache")
+
+# exponent for each power-of-ten denominator -- extended on the fly for any larger power of ten
+_DENOM_EXPONENTS = {10**exp: exp for exp in range(19)}
+
+def _denom_exponent(denominator:int):
+    """
+    find the base-10 exponent of a denominator, caching any new power of ten
+    :param  denominator: from a GncNumeric
+    :return exponent if the denominator is a power of ten, else None
+    """
+    exponent = _DENOM_EXPONENTS.get(denominator)
+    if exponent is None and denominator > 0:
+        digits = str(denominator)
+        if digits[0] == '1' and digits.count('0') == len(digits) - 1:
+            exponent = len(digits) - 1
+            _DENOM_EXPONENTS[denominator] = exponent
+    return exponent
+
+def _num_denom_to_decimal(numerator:int, denominator:int) -> Decimal:
+    """
+    convert the integer parts of a GncNumeric to a python Decimal without any string or float handling
+    :param    numerator: integer numerator
+    :param  denominator: integer denominator
+    :return python Decimal equivalent
+    """
+    exponent = _DENOM_EXPONENTS.get(denominator)
+    if exponent is None:
+        exponent = _denom_exponent(denominator)
+        if exponent is None:
+            if denominator == 0:
+                raise Exception(F"GncNumeric value '{numerator}/{denominator}' CANNOT be converted to decimal!")
+            # Gnucash uses a NEGATIVE denominator to mean 'multiply by'
+            if denominator < 0:
+                return Decimal(numerator * -denominator)
+            # NOT a decimal denominator, e.g. a price of 1/3: divide using the current Decimal context
+            return Decimal(numerator) / Decimal(denominator)
+    return Decimal(numerator).scaleb(-exponent)
 
 def gnc_numeric_to_python_decimal(numeric:GncNumeric, logger:lg.Logger = None) -> Decimal:
     """
@@ -36,34 +86,94 @@ def gnc_numeric_to_python_decimal(numeric:GncNumeric, logger:lg.Logger = None) -
     :param    logger: optional
     :return python Decimal equivalent of submitted GncNumeric value
     """
-    if logger: logger.debug(F"numeric = {numeric.num()}/{numeric.denom()}")
+    numerator = numeric.num()
+    denominator = numeric.denom()
+    if logger and logger.isEnabledFor(lg.DEBUG):
+        logger.debug(F"numeric = {numerator}/{denominator}")
+
+    return _num_denom_to_decimal(numerator, denominator)
 
-    negative = numeric.negative_p()
-    sign = 1 if negative else 0
+def gnc_numerics_to_python_decimals(numerics, logger:lg.Logger = None) -> list:
+    """
+    convert a sequence of GncNumeric values to a list of python Decimal values in one call
+    :param  numerics: iterable of GncNumeric
+    :param    logger: optional
+    :return list of python Decimals in the same order as the submitted GncNumerics
+    """
+    exponents = _DENOM_EXPONENTS
+    result = []
+    for numeric in numerics:
+        numerator = numeric.num()
+        denominator = numeric.denom()
+        exponent = exponents.get(denominator)
+        if exponent is None:
+            result.append(_num_denom_to_decimal(numerator, denominator))
+        else:
+            result.append(Decimal(numerator).scaleb(-exponent))
+    if logger and logger.isEnabledFor(lg.DEBUG):
+        logger.debug(F"converted {len(result)} numerics")
 
-    val = GncNumeric(numeric.num(), numeric.denom())
-    result = val.to_decimal(None)
-    if not result:
-        raise Exception(F"GncNumeric value '{val.to_string()}' CANNOT be converted to decimal!")
+    return result
 
-    digit_tuple = tuple(int(char) for char in str(val.num()) if char != '-')
-    denominator = val.denom()
-    exponent = int(log10(denominator))
+# GncNumeric numerators and denominators are int64: ANY 18 digit integer fits
+INT64_MAX = 2**63 - 1
+MAX_NUMERIC_DIGITS = 18
 
-    assert ((10**exponent) == denominator)
-    return Decimal((sign, digit_tuple, -exponent))
+def python_decimal_to_gnc_numeric(value:Decimal, p_fraction:int = None) -> GncNumeric:
+    """
+    convert a python Decimal value to a GncNumeric value: EXACT if it has at most 18 digits after the point
+    and 18 significant digits, else rounded to fit
+    :param       value: to convert
+    :param  p_fraction: OPTIONAL smallest fraction of the commodity, e.g. 100, to round the value to first
+    :return GncNumeric with a power-of-ten denominator
+    """
+    if not value.is_finite():
+        raise Exception(F"CANNOT convert {value} to a GncNumeric!")
+    if p_fraction:
+        value = value.quantize(_num_denom_to_decimal(1, p_fraction), rounding = ROUND_HALF_EVEN)
+    sign, digits, exponent = value.as_tuple()
+    if exponent < 0:
+        # drop the low digits that would overflow the numerator or the denominator
+        fit_exponent = min(max(exponent, -MAX_NUMERIC_DIGITS, exponent + len(digits) - MAX_NUMERIC_DIGITS), 0)
+        if fit_exponent != exponent:
+            value = value.quantize(Decimal(1).scaleb(fit_exponent), rounding = ROUND_HALF_EVEN)
+            sign, digits, exponent = value.as_tuple()
+    numerator = int(''.join(map(str, digits)))
+    if sign:
+        numerator = -numerator
+    denominator = 1
+    if exponent >= 0:
+        numerator *= 10**exponent
+    else:
+        denominator = 10**-exponent
+    if abs(numerator) > INT64_MAX:
+        raise Exception(F"{value} is TOO LARGE for a GncNumeric!")
+    return GncNumeric(numerator, denominator)
 
-def get_splits(p_acct:Account, period_starts:list, periods:list, logger:lg.Logger = None):
+def get_splits(p_acct:Account, period_starts:list, periods:list, logger:lg.Logger = None, cache:SplitCache = None,
+               stats:SessionStats = NO_STATS):
     """
     get the splits for the account and each sub-account and add to periods
     :param        p_acct: to get splits
     :param period_starts: start date for each period
     :param       periods: fill with splits for each quarter
     :param        logger: optional
+    :param         cache: optional: use the cached splits if valid
+    :param         stats: optional: time the binding calls
     """
-    if logger: logger.debug(F"account = {p_acct.GetName()}, period starts = {period_starts}, periods = {periods}")
+    if logger and logger.isEnabledFor(lg.DEBUG):
+        logger.debug(F"account = {p_acct.GetName()}, period starts = {period_starts}, periods = {periods}")
+    if cache and cache.is_valid():
+        columns = SplitColumns()
+        dates, amounts = cache.get_account_splits(p_acct.get_full_name())
+        columns.dates.extend(dates)
+        columns.amounts.extend(amounts)
+        columns.accounts.extend([columns.add_account(p_acct.get_full_name())] * len(dates))
+        aggregate_splits(columns, period_starts, [period[PERIOD_END] for period in periods]).to_periods(periods)
+        return
+
     # insert and add all splits in the periods of interest
-    for split in p_acct.GetSplitList():
+    for split in stats.timed(STAT_SPLIT_LIST, p_acct.GetSplitList):
         trans = split.parent
         # GetDate() returns a datetime but need a date
         trans_date = trans.GetDate().date()
@@ -78,6 +188,7 @@ def get_splits(p_acct:Account, period_starts:list, periods:list, logger:lg.Logge
             assert (period[1] >= trans_date >= period[0])
 
             split_amount = gnc_numeric_to_python_decimal(split.GetAmount())
+            stats.count(STAT_AMOUNTS)
 
             # if the amount is negative this is a credit, else a debit
             debit_credit_offset = 1 if split_amount < ZERO else 0
@@ -88,7 +199,72 @@ def get_splits(p_acct:Account, period_starts:list, periods:list, logger:lg.Logge
             # add the debit or credit to the overall total
             period[4] += split_amount
 
-def fill_splits(base_acct:Account, target_path:list, period_starts:list, periods:list, logger:lg.Logger = None) -> str:
+def collect_splits(p_acct:Account, columns:SplitColumns = None, logger:lg.Logger = None,
+                   stats:SessionStats = NO_STATS) -> SplitColumns:
+    """
+    walk the account and ALL its descendants ONCE and collect the date, amount and account of every split
+    :param   p_acct: top of the account subtree
+    :param  columns: optional existing columns to add to
+    :param    stats: optional: time the binding calls
+    :return columns with the splits of each account in the subtree
+    """
+    if columns is None:
+        columns = SplitColumns()
+    accounts = [p_acct]
+    accounts.extend(p_acct.get_descendants())
+    if logger and logger.isEnabledFor(lg.DEBUG):
+        logger.debug(F"account = {p_acct.GetName()}; collect splits from {len(accounts)} accounts")
+
+    for acct in accounts:
+        splits = stats.timed(STAT_SPLIT_LIST, acct.GetSplitList)
+        # GetDate() returns a datetime but need a date
+        dates = [split.parent.GetDate().date() for split in splits]
+        with stats.timer(STAT_AMOUNTS):
+            amounts = gnc_numerics_to_python_decimals(split.GetAmount() for split in splits)
+        stats.count(STAT_AMOUNTS, len(amounts))
+        columns.extend(dates, amounts, columns.add_account(acct.get_full_name()))
+
+    return columns
+
+def aggregate_account_splits(base_acct:Account, target_path:list, period_starts:list, period_ends:list,
+                             logger:lg.Logger = None) -> SplitAggregate:
+    """
+    get the debit/credit/total sums per period for the target account and each of its descendants
+    :param       base_acct: base account
+    :param     target_path: account hierarchy from base account to target account
+    :param   period_starts: start date for each period
+    :param     period_ends: end date for each period
+    :param          logger: optional
+    :return sums per account and rolled-up
+    """
+    account_of_interest = account_from_path(base_acct, target_path, logger)
+    columns = collect_splits(account_of_interest, logger = logger)
+    return aggregate_splits(columns, period_starts, period_ends)
+
+def bucket_account_splits(base_acct:Account, target_path:list, calendar:PeriodCalendar, logger:lg.Logger = None,
+                          cache:SplitCache = None, stats:SessionStats = NO_STATS) -> PeriodSums:
+    """
+    get the debit/credit/total sums and split count per period of the calendar, which may have overlapping periods,
+    for the target account and ALL its descendants
+    :param       base_acct: base account
+    :param     target_path: account hierarchy from base account to target account
+    :param        calendar: periods to sum
+    :param          logger: optional
+    :param           cache: optional: use the cached splits if valid
+    :param           stats: optional: time the binding calls
+    :return sums per period
+    """
+    if cache and cache.is_valid():
+        full_name = cache.account_from_path(target_path, base_acct.get_full_name())
+        if logger and logger.isEnabledFor(lg.DEBUG):
+            logger.debug(F"account of interest = {full_name} from cache")
+        return calendar.bucket_columns(cache.get_subtree_columns(full_name))
+
+    account_of_interest = account_from_path(base_acct, target_path, logger)
+    return calendar.bucket_columns(collect_splits(account_of_interest, logger = logger, stats = stats))
+
+def fill_splits(base_acct:Account, target_path:list, period_starts:list, periods:list, logger:lg.Logger = None,
+                cache:SplitCache = None, stats:SessionStats = NO_STATS) -> str:
     """
     fill the period list for each account
     :param       base_acct: base account
@@ -96,25 +272,66 @@ def fill_splits(base_acct:Account, target_path:list, period_starts:list, periods
     :param   period_starts: start date for each period
     :param         periods: fill with the splits dates and amounts for requested time span
     :param          logger: optional
+    :param           cache: optional: use the cached splits if valid
+    :param           stats: optional: time the binding calls
     :return name of target_acct
     """
+    if cache and cache.is_valid():
+        full_name = cache.fill_splits(target_path, period_starts, periods, base_acct.get_full_name())
+        if logger and logger.isEnabledFor(lg.DEBUG):
+            logger.debug(F"account of interest = {full_name} from cache")
+        return full_name.rpartition(ACCOUNT_SEPARATOR)[2]
+
     account_of_interest = account_from_path(base_acct, target_path, logger)
     acct_name = account_of_interest.GetName()
-    if logger: logger.debug(F"base account = {base_acct.GetName()}; account of interest = {acct_name}")
+    if logger and logger.isEnabledFor(lg.DEBUG):
+        logger.debug(F"base account = {base_acct.GetName()}; account of interest = {acct_name}")
 
-    # get the split amounts for the parent account
-    get_splits(account_of_interest, period_starts, periods, logger)
-    descendants = account_of_interest.get_descendants()
-    if len(descendants) > 0:
-        # for EACH sub-account add to the overall total
-        for subAcct in descendants:
-            get_splits(subAcct, period_starts, periods)
+    # get the split amounts for the parent account and EACH sub-account in one pass
+    columns = collect_splits(account_of_interest, logger = logger, stats = stats)
+    aggregate = aggregate_splits(columns, period_starts, [period[PERIOD_END] for period in periods])
+    aggregate.to_periods(periods)
 
-    if logger and logger.level < lg.DEBUG:
+    if logger and logger.isEnabledFor(TRACE):
         csv_write_period_list(periods)
 
     return acct_name
 
+def commodity_key(comm:GncCommodity) -> str:
+    """:return 'namespace:mnemonic' identifying a Gnucash commodity"""
+    if not comm:
+        return ""
+    return F"{comm.get_namespace()}:{comm.get_mnemonic()}"
+
+def build_split_cache(root_acct:Account, cache:SplitCache, logger:lg.Logger = None,
+                      stats:SessionStats = NO_STATS) -> SplitCache:
+    """
+    read the account tree and ALL the splits of a book into the cache and save it
+    :param  root_acct: root Account of the book
+    :param      cache: to fill
+    :param     logger: optional
+    :param      stats: optional: time the binding calls
+    :return the filled cache
+    """
+    # take the version and fingerprint BEFORE reading so any concurrent change makes the cache stale
+    version = file_version(cache.get_gnc_file())
+    fingerprint = file_fingerprint(cache.get_gnc_file())
+    cache.clear()
+    cache.add_account(root_acct.get_full_name(), None, commodity_key(root_acct.GetCommodity()), [], [])
+    # descendants are returned with each parent BEFORE its children
+    for acct in root_acct.get_descendants():
+        splits = stats.timed(STAT_SPLIT_LIST, acct.GetSplitList)
+        dates = [split.parent.GetDate().date() for split in splits]
+        with stats.timer(STAT_AMOUNTS):
+            amounts = gnc_numerics_to_python_decimals(split.GetAmount() for split in splits)
+        stats.count(STAT_AMOUNTS, len(amounts))
+        cache.add_account(acct.get_full_name(), acct.get_parent().get_full_name(), commodity_key(acct.GetCommodity()),
+                          dates, amounts)
+    cache.set_fingerprint(fingerprint, version)
+    cache.save()
+    if logger: logger.info(F"built split cache for {len(cache.columns.names)} accounts")
+    return cache
+
 def account_from_path(top_account:Account, account_path:list, logger:lg.Logger = None) -> Account:
     """
     RECURSIVE function to get a Gnucash Account: starting from the top account and following the path
@@ -123,7 +340,8 @@ def account_from_path(top_account:Account, account_path:list, logger:lg.Logger =
     :param         logger: optional
     :return requested Gnucash Account
     """
-    if logger: logger.debug(F"top account = {top_account.GetName()}; account path = {account_path}")
+    if logger and logger.isEnabledFor(lg.DEBUG):
+        logger.debug(F"top account = {top_account.GetName()}; account path = {account_path}")
 
     acct_name = account_path[0]
     acct_path = account_path[1:]
@@ -136,23 +354,210 @@ def account_from_path(top_account:Account, account_path:list, logger:lg.Logger =
     else:
         return acct
 
-def csv_write_period_list(periods:list, logger:lg.Logger = None):
+def csv_write_period_list(periods:list, logger:lg.Logger = None, dest = None):
     """
     Write out the details of the submitted period list in csv format
     :param   periods: dates and amounts for each quarter
     :param    logger: optional
-    :return to stdout
+    :param      dest: optional file name or open file
+    :return to stdout by default
+    """
+    if logger and logger.isEnabledFor(lg.DEBUG):
+        logger.debug(F"periods = {periods}")
+
+    export_table(period_table(periods), dest, CSV)
+
+
+@lru_cache(maxsize = 4096)
+def parse_price_date(p_date:str) -> dt:
+    """:return midnight on the date of a Monarch price, e.g. '15-Mar-2024'"""
+    conv_date = dt.strptime(p_date, "%d-%b-%Y")
+    return dt(conv_date.year, conv_date.month, conv_date.day)
+
+# remove the decimal point and dollar sign from a Monarch price string
+_PRICE_DELETE = str.maketrans('', '', '.$')
+
+def parse_price_value(p_price:str) -> int:
+    """:return a Monarch price string with 4 decimal places, e.g. '$12.3456', as an integer number of 1/10000"""
+    return int(p_price.translate(_PRICE_DELETE))
+
+def pair_trades(trades:list) -> tuple:
+    """
+    match each switch with its counterpart: same trade date and opposite gross amount
+    :param  trades: transaction dicts as used by GnucashSession.create_trade_tx()
+    :return list of (tx1, tx2) with tx2 None if NOT a switch, and list of switches with NO counterpart
+    """
+    pairs = []
+    # unmatched switches by (trade date, gross)
+    waiting = {}
+    for trade in trades:
+        if trade[TYPE] not in PAIRED_TYPES:
+            pairs.append((trade, None))
+            continue
+        trade_date = (trade[TRADE_YR], trade[TRADE_MTH], trade[TRADE_DAY])
+        matches = waiting.get((trade_date, -trade[GROSS]))
+        if matches:
+            pairs.append((matches.pop(0), trade))
+        else:
+            waiting.setdefault((trade_date, trade[GROSS]), []).append(trade)
+    singles = [trade for matches in waiting.values() for trade in matches]
+    return pairs, singles
+
+
+def _account_key(acct:Account) -> str:
+    """
+    the binding wrappers are NOT unique per account and their ids are recycled once freed,
+    so accounts are identified by their GUID
+    """
+    return acct.GetGUID().to_string()
+
+class AccountIndex:
+    """
+    Full name -> Account map, resolved paths and descendant lists for ALL the accounts of a book,
+    so repeated account lookups are dict hits instead of walks up the account tree in the Gnucash bindings.
+    """
+    def __init__(self, p_root:Account, p_logger:lg.Logger = None):
+        self._lgr = p_logger
+        self._root = p_root
+        self._valid = False
+
+    def invalidate(self):
+        """MUST be called after accounts are added, moved or renamed"""
+        self._valid = False
+
+    def _check(self):
+        if not self._valid:
+            self.rebuild()
+
+    def rebuild(self):
+        root_name = self._root.get_full_name()
+        self._root_name = root_name
+        self._accounts = {root_name: self._root}   # full name -> Account
+        self._full_names = {_account_key(self._root): root_name}   # GUID -> full name
+        self._children = {root_name: []}           # full name -> list of child full names
+        self._paths = {}                           # (top full name, path) -> full name
+        # descendants are returned with each parent BEFORE its children
+        for acct in self._root.get_descendants():
+            full_name = acct.get_full_name()
+            self._accounts[full_name] = acct
+            self._full_names[_account_key(acct)] = full_name
+            self._children[full_name] = []
+            self._children[full_name.rpartition(ACCOUNT_SEPARATOR)[0] if ACCOUNT_SEPARATOR in full_name
+                           else root_name].append(full_name)
+        # precompute the descendants of every account, children first
+        self._descendants = {}
+        for full_name in reversed(list(self._children)):
+            descendants = []
+            for child in self._children[full_name]:
+                descendants.append(self._accounts[child])
+                descendants.extend(self._descendants[child])
+            self._descendants[full_name] = descendants
+        self._valid = True
+        if self._lgr: self._lgr.debug(F"indexed {len(self._accounts)} accounts")
+
+    def get_full_name(self, acct:Account) -> str:
+        self._check()
+        full_name = self._full_names.get(_account_key(acct))
+        return acct.get_full_name() if full_name is None else full_name
+
+    def get_account(self, full_name:str) -> Account:
+        self._check()
+        return self._accounts.get(full_name)
+
+    def lookup_by_name(self, acct_parent:Account, acct_name:str) -> Account:
+        """:return same as acct_parent.lookup_by_name(acct_name)"""
+        return self.account_from_path([acct_name], acct_parent)
+
+    def account_from_path(self, account_path:list, top_account:Account = None) -> Account:
+        """
+        :param   account_path: path to follow, as for account_from_path()
+        :param    top_account: base Account, default is the root
+        :return requested Gnucash Account
+        """
+        self._check()
+        top_name = self._root_name if top_account is None else self.get_full_name(top_account)
+        key = (top_name, tuple(account_path))
+        full_name = self._paths.get(key)
+        if full_name is None:
+            full_name = tree_account_from_path(self._children, account_path, top_name)
+            self._paths[key] = full_name
+        return self._accounts[full_name]
+
+    def get_descendants(self, acct:Account) -> list:
+        """:return same Accounts as acct.get_descendants()"""
+        self._check()
+        return self._descendants[self.get_full_name(acct)]
+
+
+class PriceCache:
     """
-    if logger: logger.debug(F"periods = {periods}")
+    (commodity, currency) -> date-sorted rates loaded in bulk from the price DB,
+    so currency conversions are done in python Decimal instead of a price DB lookup per account and date.
+    """
+    def __init__(self, p_logger:lg.Logger = None):
+        self._lgr = p_logger
+        self._rates = {}  # (commodity key, currency key) -> ([date ordinals], [Decimal rates])
+        self._quoted = {} # (commodity key, currency key) -> date ordinals of prices quoted AS commodity in currency
 
-    # write out the column headers
-    csv_writer = csv.writer(stdout)
-    # csv_writer.writerow('')
-    csv_writer.writerow(('period start', 'period end', 'debits', 'credits', 'TOTAL'))
+    def __len__(self):
+        return sum(len(dates) for dates, _ in self._rates.values())
 
-    # write out the overall totals for the account of interest
-    for start_date, end_date, debit_sum, credit_sum, total in periods:
-        csv_writer.writerow((start_date, end_date, debit_sum, credit_sum, total))
+    def load(self, price_db, commodities:list, currency:GncCommodity):
+        """
+        read ALL the prices of each commodity in the currency, in ONE price DB scan per commodity
+        :param      price_db: Gnucash price DB
+        :param   commodities: GncCommodity of each account that is NOT in the currency
+        :param      currency: to convert to
+        """
+        curr_key = commodity_key(currency)
+        for comm in commodities:
+            prices = [(prc.get_time64().date().toordinal(), gnc_numeric_to_python_decimal(prc.get_value()))
+                      for prc in price_db.get_prices(comm, currency)]
+            self._quoted[(commodity_key(comm), curr_key)] = {pair[0] for pair in prices}
+            # ALSO use any prices quoted the other way round
+            prices.extend((prc.get_time64().date().toordinal(), 1 / gnc_numeric_to_python_decimal(prc.get_value()))
+                          for prc in price_db.get_prices(currency, comm) if not prc.get_value().zero_p())
+            prices.sort(key = lambda pair: pair[0])
+            self._rates[(commodity_key(comm), curr_key)] = ([pair[0] for pair in prices], [pair[1] for pair in prices])
+        if self._lgr: self._lgr.debug(F"loaded {len(self)} prices for {len(commodities)} commodities")
+
+    def add(self, comm:GncCommodity, currency:GncCommodity, p_date:date, rate:Decimal):
+        """keep the cache current with a price added during the session"""
+        key = (commodity_key(comm), commodity_key(currency))
+        dates, rates = self._rates.setdefault(key, ([], []))
+        self._quoted.setdefault(key, set()).add(p_date.toordinal())
+        index = bisect_right(dates, p_date.toordinal())
+        dates.insert(index, p_date.toordinal())
+        rates.insert(index, rate)
+
+    def has_price(self, comm:GncCommodity, currency:GncCommodity, p_date:dt) -> bool:
+        """:return True if a price of the commodity quoted in the currency, NOT the inverse, was loaded for the date"""
+        return p_date.toordinal() in self._quoted.get((commodity_key(comm), commodity_key(currency)), ())
+
+    def get_rate(self, comm:GncCommodity, currency:GncCommodity, p_date:date) -> Decimal:
+        """
+        :return the LATEST rate on or before the date, as the price DB lookup does,
+                or None if the commodity was NOT loaded or has NO such price in the currency
+        """
+        pair = self._rates.get((commodity_key(comm), commodity_key(currency)))
+        if not pair:
+            return None
+        dates, rates = pair
+        index = bisect_right(dates, p_date.toordinal())
+        return rates[index - 1] if index > 0 else None
+
+    def convert(self, amount:Decimal, comm:GncCommodity, currency:GncCommodity, p_date:date) -> Decimal:
+        """
+        :param    amount: in the commodity
+        :param      comm: to convert from
+        :param  currency: to convert to, rounded half to even to the currency fraction as Gnucash does
+        :param    p_date: of the balance
+        :return converted amount or None if NO rate is available
+        """
+        rate = self.get_rate(comm, currency, p_date)
+        if rate is None:
+            return None
+        return (amount * rate).quantize(_num_denom_to_decimal(1, currency.get_fraction()), rounding = ROUND_HALF_EVEN)
 
 
 # noinspection PyAttributeOutsideInit
@@ -168,8 +573,11 @@ class GnucashSession:
             trade txs
             price txs
     """
-    def __init__(self, p_mode:str, p_gncfile:str, p_domain:str, p_logger:lg.Logger, p_currency:GncCommodity = None):
-        self._lgr = p_logger
+    def __init__(self, p_mode:str, p_gncfile:str, p_domain:str, p_logger:lg.Logger, p_currency:GncCommodity = None,
+                 p_use_cache:bool = False, p_lock_timeout:float = None, p_read_only:bool = False,
+                 p_stats_file:str = None, p_quiet:bool = False, p_use_balances:bool = False):
+        # defer formatting of the hot path log messages: quiet mode passes ONLY warnings and errors
+        self._lgr = get_lazy_logger(p_logger, p_quiet)
         self._lgr.info(F"\n\tLaunch {self.__class__.__name__} instance on file {p_gncfile}\n\t"
                        F" at Runtime = {get_current_time()}\n")
 
@@ -177,25 +585,107 @@ class GnucashSession:
         self._mode     = p_mode   # test or send
         self._domain   = p_domain # txs and/or prices
 
+        # read-only sessions can share the file with other readers but can NEVER save changes
+        self._read_only = p_read_only
+        if self._read_only and self._mode == SEND:
+            raise Exception(F"a read-only session CANNOT be in {SEND} mode!")
+
         self._currency = None
         self.set_currency(p_currency)
 
-        # PREVENT multiple instances/threads from trying to use the SAME Gnucash file AT THE SAME TIME
-        self._lock = dict()
-        self._lock[self._gnc_file] = threading.Lock()
-        self._lgr.info(F"locks defined = {str(self._lock)}")
+        # PREVENT multiple instances/threads/processes from trying to use the SAME Gnucash file AT THE SAME TIME
+        self._lock = GncFileLock(self._gnc_file, self._lgr)
+        self._lock_timeout = p_lock_timeout  # seconds, or None to wait as long as necessary
+        self._lgr.info(F"lock defined = {str(self._lock)}")
+
+        self._price_cache = None
+        self._session = None
+
+        # counters and timings of the hot paths, written as json to the OPTIONAL file at end_session
+        self._stats = SessionStats()
+        self._stats_file = p_stats_file
+
+        # OPTIONAL on-disk copy of the splits, to skip the Gnucash engine when the file has NOT changed
+        self._split_cache = None
+        if p_use_cache:
+            self._split_cache = SplitCache(self._gnc_file, SPLIT_CACHE_FOLDER, self._lgr)
+            self._split_cache.load()
+
+        # OPTIONAL daily balances of a SQLite book, updated with ONLY the transactions entered since the last run
+        self._balance_store = None
+        if p_use_balances:
+            store = BalanceStore(self._gnc_file, SPLIT_CACHE_FOLDER, self._lgr)
+            if store.is_supported():
+                store.load()
+                self._balance_store = store
+            else:
+                self._lgr.warning(F"balance store needs a SQLite book: NOT used for '{self._gnc_file}'")
 
     def get_domain(self) -> str:
         return self._domain
 
+    def is_read_only(self) -> bool:
+        return self._read_only
+
     def get_root_acct(self) -> Account:
         return self._root_acct
 
+    def get_book(self):
+        return self._book
+
     def get_file_name(self):
         return self._gnc_file
 
+    def get_account_index(self) -> AccountIndex:
+        return self._acct_index
+
+    def add_account(self, p_acct:Account, p_parent:Account = None):
+        """
+        add a NEW account to the book and invalidate the account index
+        :param    p_acct: new Account
+        :param  p_parent: default is the root account
+        """
+        parent = self._root_acct if p_parent is None else p_parent
+        parent.append_child(p_acct)
+        self._acct_index.invalidate()
+
+    def get_logger(self) -> LazyLogger:
+        return self._lgr
+
+    def set_quiet(self, p_quiet:bool):
+        """True to skip the debug and info messages, e.g. for a nightly run"""
+        self._lgr.set_quiet(p_quiet)
+
+    def get_stats(self) -> SessionStats:
+        return self._stats
+
+    def get_split_cache(self) -> SplitCache:
+        """:return the split cache if in use AND valid for the current version of the Gnucash file, else None"""
+        if self._split_cache and self._split_cache.is_valid():
+            return self._split_cache
+        return None
+
     def add_price(self, prc:GncPrice):
-        self._price_db.add_price(prc)
+        self._stats.timed(STAT_PRICE_COMMIT, self._price_db.add_price, prc)
+        if self._price_cache:
+            self._price_cache.add(prc.get_commodity(), prc.get_currency(), prc.get_time64().date(),
+                                  gnc_numeric_to_python_decimal(prc.get_value()))
+
+    def get_price_cache(self) -> PriceCache:
+        return self._price_cache
+
+    def load_price_cache(self):
+        """read the prices of EVERY commodity held in an account of the book in one pass of the price DB"""
+        commodities = {}
+        for acct in [self._root_acct] + self._acct_index.get_descendants(self._root_acct):
+            comm = acct.GetCommodity()
+            if comm and comm != self._currency:
+                commodities.setdefault(commodity_key(comm), comm)
+        self._price_cache = PriceCache(self._lgr)
+        self._price_cache.load(self._book.get_price_db(), list(commodities.values()), self._currency)
+
+    def get_currency(self) -> GncCommodity:
+        return self._currency
 
     def set_currency(self, p_curr:GncCommodity):
         if not p_curr:
@@ -203,48 +693,104 @@ class GnucashSession:
             return
         if isinstance(p_curr, GncCommodity):
             self._currency = p_curr
-            self._lgr.debug(F"currency set to {p_curr}")
+            self._lgr.debug(lambda: F"currency set to {p_curr}")
         else:
             self._lgr.error(F"BAD currency '{str(p_curr)}' of type: {type(p_curr)}")
 
     def begin_session(self, p_new:bool = False):
-        # PREVENT being able to start a separate Session with this Gnucash file
-        self._lock[self._gnc_file].acquire()
-        self._lgr.info(F"Acquired '{self._gnc_file}' lock at {get_current_time()}")
-
-        self._session = Session(self._gnc_file, is_new=p_new)
+        if self._read_only and p_new:
+            raise Exception("a read-only session CANNOT create a new file!")
+
+        # PREVENT being able to start a separate Session with this Gnucash file -- other readers are ok if read-only
+        if not self._lock.acquire(timeout = self._lock_timeout, shared = self._read_only):
+            raise Exception(F"could NOT lock '{self._gnc_file}' within {self._lock_timeout} seconds!")
+
+        try:
+            self._open_session(p_new)
+        except Exception:
+            # do NOT leave the lock held: later sessions on this file would wait for it forever
+            self._lgr.error(F"could NOT begin session on '{self._gnc_file}': release the lock")
+            try:
+                if self._session:
+                    self._session.end()
+            finally:
+                self._session = None
+                self._lock.release()
+            raise
+
+    def _open_session(self, p_new:bool):
+        with self._stats.timer(STAT_SESSION_OPEN):
+            if self._read_only:
+                # do NOT take the Gnucash lock on the file
+                if SessionOpenMode:
+                    self._session = Session(self._gnc_file, SessionOpenMode.SESSION_READ_ONLY)
+                else:
+                    self._session = Session(self._gnc_file, ignore_lock=True)
+            else:
+                self._session = Session(self._gnc_file, is_new=p_new)
         self._book = self._session.book
         self._root_acct = self._book.get_root_account()
         self._root_acct.get_instance()
         self._commod_table = self._book.get_table()
+        with self._stats.timer(STAT_INDEX_BUILD):
+            self._acct_index = AccountIndex(self._root_acct, self._lgr)
+            self._acct_index.rebuild()
+        self._hold_accts = None
 
         if self._currency is None:
             self.set_currency(self._commod_table.lookup("ISO4217", "CAD"))
 
-        if self._domain in (PRICE,BOTH):
+        if self._domain in (PRICE,BOTH) and not self._read_only:
             self._price_db = self._book.get_price_db()
             self._lgr.debug('price_db.begin_edit()')
             self._price_db.begin_edit()
 
+        self.load_price_cache()
+
+        if self._split_cache and not self._split_cache.is_valid():
+            build_split_cache(self._root_acct, self._split_cache, self._lgr, self._stats)
+
+        if self._balance_store:
+            self._balance_store.update()
+            self._balance_store.save()
+
     def end_session(self, save_session:bool = False):
         if self._session:
-            if save_session:
+            if save_session and self._read_only:
+                self._lgr.warning("read-only session: NOT saved!")
+            elif save_session:
                 self._lgr.info(F"Mode = {self._mode}: SAVE session.")
-                if self._domain in (PRICE,BOTH):
-                    self._lgr.info(F"Domain = {self._domain}: COMMIT Price DB edits.")
-                    self._price_db.commit_edit()
-                self._session.save()
-            self._session.end()
+                with self._stats.timer(STAT_SESSION_SAVE):
+                    if self._domain in (PRICE,BOTH):
+                        self._lgr.info(F"Domain = {self._domain}: COMMIT Price DB edits.")
+                        self._price_db.commit_edit()
+                    self._session.save()
+            self._stats.timed(STAT_SESSION_END, self._session.end)
             self._session = None
 
-        # RELEASE the thread lock on this Gnucash file if still present
-        if self._gnc_file and self._lock[self._gnc_file]:
-            self._lock[self._gnc_file].release()
-            self._lgr.info(F"released lock '{self._gnc_file}' at {get_current_time()}")
+        if self._balance_store and save_session and not self._read_only:
+            self._balance_store.update()
+            self._balance_store.save()
+
+        # RELEASE the lock on this Gnucash file if still present
+        if self._gnc_file and self._lock.is_held():
+            self._lock.release()
             self._gnc_file = None
 
+        if self._stats_file:
+            self._stats.dump(self._stats_file)
+            self._lgr.info(F"session stats written to '{self._stats_file}'")
         self._lgr.info(f"Gnucash session ENDED at {get_current_time()}")
 
+    def release_lock(self):
+        """
+        let other processes use the Gnucash file while this session stays open:
+        ONLY for read-only sessions, whose book is fully loaded in memory by begin_session
+        """
+        if not self._read_only:
+            raise Exception("ONLY a read-only session can release its lock early!")
+        self._lock.release()
+
     def check_end_session(self, p_locals:dict):
         if "gnucash_session" in p_locals and self._session is not None:
             self._session.end()
@@ -258,20 +804,15 @@ class GnucashSession:
         """
         if acct_parent is None:
             acct_parent = self.get_root_acct()
-        acct_parent_name = acct_parent.GetName()
-        self._lgr.debug(F"account parent = {acct_parent_name}; account = {acct_name}")
-
-        # special location for Trust assets
-        if acct_name == TRUST_AST_ACCT:
-            found_acct = self._root_acct.lookup_by_name(TRUST).lookup_by_name(TRUST_AST_ACCT)
-        else:
-            found_acct = acct_parent.lookup_by_name(acct_name)
+        self._lgr.debug(lambda: F"account parent = {self._acct_index.get_full_name(acct_parent)}; account = {acct_name}")
 
-        if not found_acct:
-            raise Exception(F"Could NOT find acct '{acct_name}' under parent '{acct_parent_name}'")
-
-        self._lgr.debug(F"Found account: {found_acct.GetName()}")
-        return found_acct
+        try:
+            # special location for Trust assets
+            if acct_name == TRUST_AST_ACCT:
+                return self._stats.timed(STAT_INDEX_LOOKUP, self._acct_index.account_from_path, [TRUST, TRUST_AST_ACCT])
+            return self._stats.timed(STAT_INDEX_LOOKUP, self._acct_index.lookup_by_name, acct_parent, acct_name)
+        except Exception:
+            raise Exception(F"Could NOT find acct '{acct_name}' under parent '{acct_parent.GetName()}'")
 
     def get_account_balance(self, acct:Account, p_date:date, p_currency:GncCommodity = None) -> Decimal:
         """
@@ -282,15 +823,40 @@ class GnucashSession:
         :return Decimal with balance
         """
         # CALLS ARE RETRIEVING ACCOUNT BALANCES FROM DAY BEFORE!!??
-        p_date += ONE_DAY
+        bal_date = p_date + ONE_DAY
 
         currency = self._currency if p_currency is None else p_currency
-        acct_bal = acct.GetBalanceAsOfDate(p_date)
+        acct_bal = self._stats.timed(STAT_BALANCE, acct.GetBalanceAsOfDate, bal_date)
         acct_comm = acct.GetCommodity()
         # check if account is already in the desired currency and convert if necessary
-        acct_cur = acct_bal if acct_comm == currency else acct.ConvertBalanceToCurrencyAsOfDate(acct_bal, acct_comm, currency, p_date)
+        if acct_comm == currency:
+            return gnc_numeric_to_python_decimal(acct_bal)
+        return self._convert_balance(acct, gnc_numeric_to_python_decimal(acct_bal), acct_comm, currency, p_date)
 
-        return gnc_numeric_to_python_decimal(acct_cur)
+    def _convert_balance(self, acct:Account, p_bal:Decimal, p_comm:GncCommodity, p_currency:GncCommodity, p_date:date) -> Decimal:
+        """
+        convert a balance with the price cache, or with the price DB if the cache has NO rate
+        :param       acct: Gnucash Account of the balance
+        :param      p_bal: balance in the account commodity
+        :param     p_comm: account commodity
+        :param p_currency: to convert to
+        :param     p_date: of the balance
+        :return Decimal balance in the currency
+        """
+        if not p_bal:
+            return p_bal
+        with self._stats.timer(STAT_CONVERT):
+            return self._convert_nonzero_balance(acct, p_bal, p_comm, p_currency, p_date)
+
+    def _convert_nonzero_balance(self, acct:Account, p_bal:Decimal, p_comm:GncCommodity, p_currency:GncCommodity,
+                                 p_date:date) -> Decimal:
+        if self._price_cache:
+            converted = self._price_cache.convert(p_bal, p_comm, p_currency, p_date)
+            if converted is not None:
+                return converted
+        # CALLS ARE RETRIEVING ACCOUNT BALANCES FROM DAY BEFORE!!??
+        return gnc_numeric_to_python_decimal(acct.ConvertBalanceToCurrencyAsOfDate(
+                   python_decimal_to_gnc_numeric(p_bal, p_comm.get_fraction()), p_comm, p_currency, p_date + ONE_DAY))
 
     def get_total_balance(self, p_path:list, p_date:date, p_currency:GncCommodity = None) -> Decimal:
         """
@@ -301,20 +867,86 @@ class GnucashSession:
         :return Decimal with total balance
         """
         currency = self._currency if p_currency is None else p_currency
-        acct = account_from_path(self._root_acct, p_path)
+        cache = self.get_split_cache()
+        if cache:
+            acct_sum = cache.get_total_balance(p_path, p_date, commodity_key(currency))
+            if acct_sum is not None:
+                self._lgr.debug(lambda: F"{p_path} on {p_date} = {acct_sum} from cache")
+                return acct_sum
+        store = self._balance_store
+        if store:
+            if not store.is_current():
+                store.update()
+            acct_sum = store.get_total_balance(p_path, p_date, commodity_key(currency))
+            if acct_sum is not None:
+                self._lgr.debug(lambda: F"{p_path} on {p_date} = {acct_sum} from balance store")
+                return acct_sum
+
+        acct = self._acct_index.account_from_path(p_path)
         # get the split amounts for the parent account
         acct_sum = self.get_account_balance(acct, p_date, currency)
 
-        descendants = acct.get_descendants()
+        descendants = self._acct_index.get_descendants(acct)
         if len(descendants) > 0:
             # for EACH sub-account add to the overall total
             for sub_acct in descendants:
                 # ?? GETTING SLIGHT ROUNDING ERRORS WHEN ADDING MUTUAL FUND VALUES...
                 acct_sum += self.get_account_balance(sub_acct, p_date, currency)
 
-        self._lgr.debug(F"{acct.GetName()} on {p_date} = {acct_sum}")
+        self._lgr.debug(lambda: F"{acct.GetName()} on {p_date} = {acct_sum}")
         return acct_sum
 
+    def get_account_balance_series(self, acct:Account, p_dates:list, p_currency:GncCommodity = None) -> list:
+        """
+        get the BALANCE in this account on EACH of the dates from ONE scan of its splits
+        :param        acct: Gnucash Account
+        :param     p_dates: SORTED dates
+        :param  p_currency: Gnucash commodity
+        :return Decimal balance for each date
+        """
+        currency = self._currency if p_currency is None else p_currency
+        cache = self.get_split_cache()
+        if cache:
+            split_dates, amounts = cache.get_account_splits(self._acct_index.get_full_name(acct))
+        else:
+            splits = sorted(((split.parent.GetDate().date().toordinal(), split.GetAmount())
+                             for split in self._stats.timed(STAT_SPLIT_LIST, acct.GetSplitList)), key = lambda pair: pair[0])
+            split_dates = [pair[0] for pair in splits]
+            amounts = gnc_numerics_to_python_decimals(pair[1] for pair in splits)
+            self._stats.count(STAT_AMOUNTS, len(amounts))
+        balances = running_balances(split_dates, amounts, p_dates)
+
+        acct_comm = acct.GetCommodity()
+        # check if account is already in the desired currency and convert if necessary
+        if acct_comm == currency:
+            return balances
+        return [self._convert_balance(acct, bal, acct_comm, currency, bal_date) for bal, bal_date in zip(balances, p_dates)]
+
+    def get_balance_series(self, p_dates:list, p_paths:dict, p_currency:GncCommodity = None) -> BalanceMatrix:
+        """
+        get the total BALANCE of each account path and all its sub-accounts on EACH of the dates
+        :param     p_dates: to get the balances
+        :param     p_paths: item name -> path to the account, as for get_account_assets()
+        :param  p_currency: Gnucash Commodity: optional currency to use for the totals
+        :return date x item matrix of Decimal balances
+        """
+        currency = self._currency if p_currency is None else p_currency
+        dates = sorted(p_dates)
+        matrix = BalanceMatrix(dates, list(p_paths))
+        self._lgr.debug(lambda: F"{len(dates)} dates x {len(p_paths)} items")
+
+        # items may share sub-accounts: calculate the balances of EACH account just once
+        acct_balances = {}
+        for item, acct_path in p_paths.items():
+            acct = self._acct_index.account_from_path(acct_path)
+            for sub_acct in [acct] + self._acct_index.get_descendants(acct):
+                full_name = self._acct_index.get_full_name(sub_acct)
+                if full_name not in acct_balances:
+                    acct_balances[full_name] = self.get_account_balance_series(sub_acct, dates, currency)
+                matrix.add_to_column(item, acct_balances[full_name])
+
+        return matrix
+
     def get_account_assets(self, asset_accts:dict, end_date:date, p_currency:GncCommodity = None, p_data:dict = None) -> dict:
         """
         Get ASSET data for the specified accounts for the specified date
@@ -324,7 +956,7 @@ class GnucashSession:
         :param   p_currency: Gnucash Commodity: optional currency to use for the sums
         :return dict with amounts
         """
-        self._lgr.debug(F"end_date = {end_date}")
+        self._lgr.debug(lambda: F"end_date = {end_date}")
 
         data = {} if p_data is None else p_data
         currency = self._currency if p_currency is None else p_currency
@@ -343,35 +975,35 @@ class GnucashSession:
         :param   pl_owner: needed to find proper account for RRSP & TFSA plan types
         :return requested Account
         """
-        self._lgr.debug(f"account type = {acct_type}; plan type = {plan_type}; plan owner = {pl_owner}")
+        self._lgr.debug(lambda: f"account type = {acct_type}; plan type = {plan_type}; plan owner = {pl_owner}")
 
         if acct_type not in (ASSET,REV):
             raise Exception(f"GnucashSession._get_asset_or_revenue_account(): BAD Account type: {acct_type}!")
         account_path = copy(ACCT_PATHS[acct_type])
-        self._lgr.debug(f"account_path = {account_path}")
+        self._lgr.debug(lambda: f"account_path = {account_path}")
 
         if plan_type not in (OPEN,RRSP,TFSA):
             raise Exception(f"GnucashSession._get_asset_or_revenue_account(): BAD Plan type: {plan_type}!")
         account_path.append(plan_type)
-        self._lgr.debug(f"account_path = {account_path}")
+        self._lgr.debug(lambda: f"account_path = {account_path}")
 
         if plan_type in (RRSP,TFSA):
             if pl_owner not in (MON_MARK,MON_LULU):
                 raise Exception(f"GnucashSession._get_asset_or_revenue_account(): BAD Owner value: {pl_owner}!")
             account_path.append(ACCT_PATHS[pl_owner])
-            self._lgr.debug(f"account_path = {account_path}")
+            self._lgr.debug(lambda: f"account_path = {account_path}")
 
-        target_account = account_from_path(self._root_acct, account_path, logger = self._lgr)
-        self._lgr.info(f"target_account = {target_account.GetName()}")
+        target_account = self._acct_index.account_from_path(account_path)
+        self._lgr.info(lambda: f"target_account = {target_account.GetName()}")
 
         return target_account
 
     def get_asset_account(self, plan_type:str, pl_owner:str) -> Account:
-        self._lgr.debug(get_current_time())
+        self._lgr.debug(get_current_time)
         return self._get_asset_or_revenue_account(ASSET, plan_type, pl_owner)
 
     def get_revenue_account(self, plan_type:str, pl_owner:str) -> Account:
-        self._lgr.debug(get_current_time())
+        self._lgr.debug(get_current_time)
         return self._get_asset_or_revenue_account(REV, plan_type, pl_owner)
 
     def show_account(self, p_path:list):
@@ -379,17 +1011,30 @@ class GnucashSession:
         display an account and its descendants
         :param  p_path: to the account
         """
-        acct = account_from_path(self._root_acct, p_path)
+        acct = self._acct_index.account_from_path(p_path)
         acct_name = acct.GetName()
-        self._lgr.debug(F"account = {acct_name}")
+        self._lgr.debug(lambda: F"account = {acct_name}")
 
-        descendants = acct.get_descendants()
+        descendants = self._acct_index.get_descendants(acct)
         if len(descendants) == 0:
-            self._lgr.debug(F"{acct_name} has NO Descendants!")
+            self._lgr.debug(lambda: F"{acct_name} has NO Descendants!")
         else:
-            self._lgr.debug(F"Descendants of {acct_name}:")
+            self._lgr.debug(lambda: F"Descendants of {acct_name}:")
             for item in descendants:
-                self._lgr.debug(F"account = {item.GetName()}")
+                self._lgr.debug(lambda: F"account = {item.GetName()}")
+
+    def _new_price(self, comm:GncCommodity, pr_date:dt, val:GncNumeric) -> GncPrice:
+        """:return a committed GncPrice of the commodity in the session currency"""
+        gnc_price = GncPrice(self._book)
+        gnc_price.begin_edit()
+        gnc_price.set_time64(pr_date)
+        gnc_price.set_commodity(comm)
+        gnc_price.set_currency(self._currency)
+        gnc_price.set_value(val)
+        gnc_price.set_source_string('user:price')
+        gnc_price.set_typestr('nav')
+        gnc_price.commit_edit()
+        return gnc_price
 
     def create_price(self, mtx:dict, ast_parent:Account):
         """
@@ -397,56 +1042,109 @@ class GnucashSession:
         :param        mtx: InvestmentRecord transaction
         :param ast_parent: Asset parent account
         """
-        self._lgr.debug(F"asset parent = {ast_parent}")
+        self._lgr.debug(lambda: F"asset parent = {ast_parent}")
 
-        conv_date = dt.strptime(mtx[DATE], "%d-%b-%Y")
-        pr_date = dt(conv_date.year, conv_date.month, conv_date.day)
+        pr_date = parse_price_date(mtx[DATE])
         datestring = pr_date.strftime("%Y-%m-%d")
 
         fund_name = mtx[FUND]
-        if fund_name in MONEY_MKT_FUNDS:
+        if is_money_market(fund_name):
             return
 
-        int_price = int(mtx[PRICE].replace('.','').replace('$',''))
-        val = GncNumeric(int_price, 10000)
-        self._lgr.debug(F"Adding: {fund_name}[{datestring}] @ ${val}")
-
-        gnc_price = GncPrice(self._book)
-        gnc_price.begin_edit()
-        gnc_price.set_time64(pr_date)
+        val = GncNumeric(parse_price_value(mtx[PRICE]), 10000)
+        self._lgr.debug(lambda: F"Adding: {fund_name}[{datestring}] @ ${val}")
 
         asset_acct = self.get_account(fund_name, ast_parent)
         comm = asset_acct.GetCommodity()
-        self._lgr.debug(F"Commodity = {comm.get_namespace()}:{comm.get_printname()}")
-        gnc_price.set_commodity(comm)
-
-        gnc_price.set_currency(self._currency)
-        gnc_price.set_value(val)
-        gnc_price.set_source_string('user:price')
-        gnc_price.set_typestr('nav')
-        gnc_price.commit_edit()
+        self._lgr.debug(lambda: F"Commodity = {comm.get_namespace()}:{comm.get_printname()}")
+        gnc_price = self._new_price(comm, pr_date, val)
 
         if self._mode == SEND:
-            self._lgr.debug(F"Mode = {self._mode}: Add Price to DB.")
+            self._lgr.debug(lambda: F"Mode = {self._mode}: Add Price to DB.")
             self.add_price(gnc_price)
         else:
             self._lgr.warning(F"Mode = {self._mode}: ABANDON Prices!\n")
 
-    def create_trade_tx(self, tx1:dict, tx2:dict):
+    def load_prices(self, p_record:InvestmentRecord, p_ledger:IngestLedger = None) -> dict:
         """
-        Create a TRADE transaction for the current Gnucash session
+        Add the prices of ALL the plans in an InvestmentRecord to the price DB in one pass,
+        skipping money market funds and any fund/date already in the price DB or earlier in the record
+        :param  p_record: prices of each plan
+        :param  p_ledger: optional: skip prices ALREADY imported and record the newly added ones
+        :return dict with the number of prices added, skipped as duplicates and skipped as money market
+        """
+        self._lgr.info(F"load prices for {p_record.get_owner()}: {p_record.get_size_str(type_spec = PRICE)}")
+        ledger_keys = {}
+        if p_ledger is not None:
+            # ONLY the prices: the trades of the record are NOT imported here
+            p_record, ledger_keys = p_ledger.filter_new(p_record, self._lgr, (PRICE,))
+        fund_comms = {}  # fund name -> GncCommodity
+        seen = set()     # (fund name, date)
+        new_prices = []
+        duplicates = 0
+        money_mkt = 0
+        for plan in (OPEN,TFSA,RRSP):
+            prices = p_record.get_prices(plan)
+            if not prices:
+                continue
+            ast_parent = self.get_asset_account(plan, p_record.get_owner())
+            for mtx in prices:
+                fund_name = mtx[FUND]
+                if is_money_market(fund_name):
+                    money_mkt += 1
+                    continue
+                pr_date = parse_price_date(mtx[DATE])
+                if (fund_name, pr_date) in seen:
+                    duplicates += 1
+                    continue
+                seen.add((fund_name, pr_date))
+
+                comm = fund_comms.get(fund_name)
+                if comm is None:
+                    comm = self.get_account(fund_name, ast_parent).GetCommodity()
+                    fund_comms[fund_name] = comm
+                if self._price_cache and self._price_cache.has_price(comm, self._currency, pr_date):
+                    duplicates += 1
+                    continue
+                new_prices.append((comm, pr_date, GncNumeric(parse_price_value(mtx[PRICE]), 10000)))
+
+        if self._mode == SEND:
+            for comm, pr_date, val in new_prices:
+                self.add_price(self._new_price(comm, pr_date, val))
+            self._lgr.info(F"Mode = {self._mode}: added {len(new_prices)} prices to DB.")
+            if p_ledger is not None:
+                # duplicates are ALREADY in the price DB so record them too
+                p_ledger.add(list(ledger_keys.values()))
+        else:
+            self._lgr.warning(F"Mode = {self._mode}: ABANDON {len(new_prices)} Prices!\n")
+
+        return {
+            "added"        : len(new_prices) if self._mode == SEND else 0 ,
+            "duplicates"   : duplicates ,
+            "money market" : money_mkt
+        }
+
+    def _get_hold_accounts(self) -> tuple:
+        """:return the HOLD and FIN_SERV accounts, resolved ONCE per session"""
+        if self._hold_accts is None:
+            self._hold_accts = (self._acct_index.lookup_by_name(self._root_acct, HOLD),
+                                self._acct_index.lookup_by_name(self._root_acct, FIN_SERV))
+        return self._hold_accts
+
+    def _build_trade_tx(self, tx1:dict, tx2:dict) -> Transaction:
+        """
+        Build a TRADE transaction and leave it OPEN for editing
         :param tx1: first transaction
         :param tx2: matching transaction if a switch
+        :return the open Gnucash Transaction, or None if the splits DO NOT balance and it was rolled back
         """
-        self._lgr.debug(get_current_time())
-
         # create a gnucash Tx -- gets a guid on construction
         gtx = Transaction(self._book)
         gtx.BeginEdit()
 
         gtx.SetCurrency(self._currency)
         gtx.SetDate(tx1[TRADE_DAY], tx1[TRADE_MTH], tx1[TRADE_YR])
-        self._lgr.debug(F"tx1[DESC] = {tx1[DESC]}")
+        self._lgr.debug(lambda: F"tx1[DESC] = {tx1[DESC]}")
         gtx.SetDescription(tx1[DESC])
 
         # create the ASSET split for the Tx
@@ -463,7 +1161,7 @@ class GnucashSession:
 
         if tx1[TYPE] in PAIRED_TYPES:
             # the second split is also an ASSET
-            self._lgr.debug(F"tx2[DESC] = {tx2[DESC]}")
+            self._lgr.debug(lambda: F"tx2[DESC] = {tx2[DESC]}")
             split_2.SetAccount(tx2[ACCT])
             split_2.SetValue(GncNumeric(tx2[GROSS], 100))
             split_2.SetAmount(GncNumeric(tx2[UNITS], 10000))
@@ -476,16 +1174,17 @@ class GnucashSession:
             spl_ast.SetMemo(tx1[NOTES])
             split_2.SetMemo(tx2[NOTES])
         elif tx1[TYPE] in (RDMPN,PURCH,INCASH_TRIN,INCASH_TROUT):
+            hold_acct, fin_serv_acct = self._get_hold_accounts()
             # the second split is for the HOLD account
-            split_2.SetAccount(self._root_acct.lookup_by_name(HOLD))
+            split_2.SetAccount(hold_acct)
             # MAY need a THIRD split for Financial Services expense e.g. fees, commissions
             # compare tx1[GROSS] and tx1[NET]
             if tx1[NET] != tx1[GROSS]:
-                self._lgr.debug(F"Tx net '{tx1[NET]}' != gross '{tx1[GROSS]}'")
+                self._lgr.debug(lambda: F"Tx net '{tx1[NET]}' != gross '{tx1[GROSS]}'")
                 amount_diff = tx1[NET] - tx1[GROSS]
                 split_fin_serv = Split(self._book)
                 split_fin_serv.SetParent(gtx)
-                split_fin_serv.SetAccount(self._root_acct.lookup_by_name(FIN_SERV))
+                split_fin_serv.SetAccount(fin_serv_acct)
                 split_fin_serv.SetValue(GncNumeric(amount_diff, 100))
             split_2.SetValue(GncNumeric(tx1[NET] * -1, 100))
             gtx.SetNotes(tx1[TYPE] + ": " + tx1[NOTES] if tx1[NOTES] else tx1[FUND])
@@ -507,12 +1206,77 @@ class GnucashSession:
         if not gtx.GetImbalanceValue().zero_p():
             self._lgr.error(F"Gnc tx IMBALANCE = {gtx.GetImbalanceValue().to_string()}!! Roll back transaction changes!")
             gtx.RollbackEdit()
+            return None
+
+        return gtx
+
+    def create_trade_tx(self, tx1:dict, tx2:dict):
+        """
+        Create a TRADE transaction for the current Gnucash session
+        :param tx1: first transaction
+        :param tx2: matching transaction if a switch
+        """
+        self._lgr.debug(get_current_time)
+
+        gtx = self._build_trade_tx(tx1, tx2)
+        if gtx is None:
             return
 
         if self._mode == SEND:
             self._lgr.info(F"Mode = {self._mode}: Commit transaction.")
-            gtx.CommitEdit()
+            self._stats.timed(STAT_TX_COMMIT, gtx.CommitEdit)
         else:
             self._lgr.warning(F"Mode = {self._mode}: ROLL BACK transaction!\n")
             gtx.RollbackEdit()
+
+    def create_trade_txs(self, p_record:InvestmentRecord, p_ledger:IngestLedger = None) -> dict:
+        """
+        Create ALL the TRADE transactions in an InvestmentRecord: build every transaction first, then commit them together
+        :param  p_record: trades of each plan, with switches paired by pair_trades()
+        :param  p_ledger: optional: skip trades ALREADY imported and record the newly committed ones
+        :return dict with the number of transactions built, committed and rolled back, and the imbalanced descriptions
+        """
+        self._lgr.info(F"create trades for {p_record.get_owner()}: {p_record.get_size_str(type_spec = TRADE)}")
+        ledger_keys = {}
+        if p_ledger is not None:
+            p_record, ledger_keys = p_ledger.filter_new(p_record, self._lgr, (TRADE,))
+        # resolve the shared accounts up front
+        self._get_hold_accounts()
+
+        built = []
+        committed_txs = []
+        imbalanced = []
+        unpaired = []
+        for plan in (OPEN,TFSA,RRSP):
+            pairs, singles = pair_trades(p_record.get_trades(plan))
+            unpaired.extend(tx[DESC] for tx in singles)
+            for tx1, tx2 in pairs:
+                gtx = self._build_trade_tx(tx1, tx2)
+                if gtx is None:
+                    imbalanced.append(tx1[DESC])
+                else:
+                    built.append(gtx)
+                    committed_txs.extend(tx for tx in (tx1, tx2) if tx is not None)
+
+        if self._mode == SEND:
+            for gtx in built:
+                self._stats.timed(STAT_TX_COMMIT, gtx.CommitEdit)
+            if p_ledger is not None:
+                p_ledger.add([ledger_keys[id(tx)] for tx in committed_txs])
+        else:
+            for gtx in built:
+                gtx.RollbackEdit()
+
+        result = {
+            "built"       : len(built) ,
+            "committed"   : len(built) if self._mode == SEND else 0 ,
+            "rolled back" : len(imbalanced) + (0 if self._mode == SEND else len(built)) ,
+            "imbalanced"  : imbalanced ,
+            "unpaired"    : unpaired
+        }
+        if imbalanced or unpaired:
+            self._lgr.error(F"{len(imbalanced)} IMBALANCED and {len(unpaired)} UNPAIRED trades: {imbalanced + unpaired}")
+        self._lgr.info(F"Mode = {self._mode}: {result['committed']} transactions committed, "
+                       F"{result['rolled back']} rolled back.")
+        return result
 # END class GnucashSession
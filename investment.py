@@ -10,11 +10,18 @@ __author__         = "Mark Sattolo"
 __author_email__   = "epistemik@gmail.com"
 __python_version__ = "3.6+"
 __created__ = "2018"
-__updated__ = "2025-07-20"
+__updated__ = "2026-10-17"
 
-from sys import path
+import hashlib
+import json
+import os
+import struct
+from array import array
+from itertools import compress
+from sys import path, byteorder
 path.append("/home/marksa/git/Python/utils/")
-from mhsUtils import dt, now_dt, lg, osp, FILE_DATETIME_FORMAT, get_current_time
+from datetime import timedelta
+from mhsUtils import dt, now_dt, lg, osp, FILE_DATETIME_FORMAT, get_current_time, Decimal
 from secret import *
 
 # constant strings
@@ -301,7 +308,8 @@ class InvestmentRecord:
             RRSP : {TRADE:[], PRICE:[]}
         }
 
-        self._lgr.debug(f"{self.__class__.__name__}: init time = {get_current_time()}")
+        if self._lgr.isEnabledFor(lg.DEBUG):
+            self._lgr.debug(f"{self.__class__.__name__}: init time = {get_current_time()}")
 
     def __getitem__(self, item:str):
         if item in (OPEN,TFSA,RRSP):
@@ -388,16 +396,229 @@ class InvestmentRecord:
             "Size"         : self.get_size_str(plan_spec, type_spec) ,
             PLAN_DATA      : self._records
         }
+
+    @classmethod
+    def from_json(cls, p_logger:lg.Logger, p_data:dict):
+        """
+        :param  p_logger: for the new record
+        :param    p_data: from to_json(), e.g. after json.dump(record.to_json(), fp, default = json_default)
+        :return new InvestmentRecord with CompactTxRecords
+        """
+        record = cls(p_logger, _json_owner(p_data.get(OWNER)), dt.strptime(p_data[DATE], FILE_DATETIME_FORMAT))
+        record.set_filename(_json_filename(p_data.get("Source File")))
+        for plan, plan_data in p_data[PLAN_DATA].items():
+            for tx_type, txs in plan_data.items():
+                for tx in txs:
+                    record.add_tx(plan, tx_type, tx if isinstance(tx, (TxRecord, CompactTxRecord)) else tx_from_json(tx)[2])
+        return record
+
+    def to_json_lines(self, fp) -> int:
+        """
+        write a header line then ONE line per transaction
+        :param  fp: open text file
+        :return number of transactions written
+        """
+        writer = JsonLinesWriter(fp, self)
+        for plan in (OPEN,TFSA,RRSP):
+            for tx_type in (TRADE,PRICE):
+                for tx in self._records[plan][tx_type]:
+                    writer.write(plan, tx_type, tx)
+        return writer.count
+
+    @classmethod
+    def from_json_lines(cls, p_logger:lg.Logger, fp):
+        """
+        :param  p_logger: for the new record
+        :param        fp: open text file written by to_json_lines() or a JsonLinesWriter
+        :return new InvestmentRecord with CompactTxRecords
+        """
+        header = json.loads(fp.readline())
+        if header.get(SCHEMA_KEY) != SCHEMA_VERSION:
+            raise Exception(F"UNKNOWN schema: {header.get(SCHEMA_KEY)}!")
+        record = cls(p_logger, _json_owner(header.get(OWNER)), dt.strptime(header[DATE], FILE_DATETIME_FORMAT))
+        record.set_filename(_json_filename(header.get("Source File")))
+        for line in fp:
+            if line.strip():
+                plan, tx_type, tx = tx_from_json(json.loads(line))
+                record.add_tx(plan, tx_type, tx)
+        return record
 # END class InvestmentRecord
 
 
+# versioned layout of serialized InvestmentRecords
+SCHEMA_KEY:str  = "__schema__"
+SCHEMA_VERSION  = 1
+BINARY_MAGIC    = b"INVR"
+# layout of the arrays in a binary file: version 1 had NO key
+BINARY_KEY:str  = "__binary__"
+BINARY_VERSION  = 3
+
+def _json_owner(p_owner:str) -> str:
+    return "" if not p_owner or p_owner == UNKNOWN else p_owner
+
+def _json_filename(p_fname:str) -> str:
+    # ONLY keep the source file name if it still exists, as InvestmentRecord requires
+    return p_fname if p_fname and p_fname != UNKNOWN and osp.isfile(p_fname) else ""
+
+def tx_to_json(p_tx, p_plan:str = "", p_type:str = "") -> dict:
+    """
+    :param    p_tx: TxRecord or CompactTxRecord
+    :param  p_plan: optional, to write the transaction on its own
+    :param  p_type: optional, to write the transaction on its own
+    :return schema-stable dict with the numerics as fixed-point ints
+    """
+    if not isinstance(p_tx, CompactTxRecord):
+        p_tx = CompactTxRecord.from_tx_record(p_tx)
+    data = { "date": p_tx.date.isoformat() if p_tx.date else "", "date_str": p_tx._date_str, "switch": p_tx.switch,
+             "company": p_tx.company, "code": p_tx.fd_code, "fund": p_tx.fd_name, "gross": p_tx.gross_fixed,
+             "price": p_tx.price_fixed, "units": p_tx.units_fixed }
+    if p_plan:
+        data["plan"] = p_plan
+    if p_type or p_tx.type:
+        data["type"] = p_type if p_type else p_tx.type
+    if p_tx.desc:
+        data["desc"] = p_tx.desc
+    if p_tx.tx_type:
+        data["tx_type"] = p_tx.tx_type
+    return data
+
+def tx_from_json(p_data:dict) -> tuple:
+    """:return (plan, type, CompactTxRecord) from a tx_to_json() dict: plan and type are empty if NOT included"""
+    tx = CompactTxRecord(dt.fromisoformat(p_data["date"]) if p_data["date"] else None, p_data.get("date_str", ""),
+                         p_data["switch"], p_data["company"], p_data["code"], p_data["fund"], p_data["gross"],
+                         p_data["price"], p_data["units"], p_data.get("type", ""), p_data.get("desc", ""),
+                         p_data.get("tx_type", ""))
+    return p_data.get("plan", ""), p_data.get("type", ""), tx
+
+def json_default(obj):
+    """use as json.dump(record.to_json(), fp, default = json_default)"""
+    if isinstance(obj, (TxRecord, CompactTxRecord)):
+        return tx_to_json(obj)
+    raise TypeError(F"CANNOT serialize {type(obj)}")
+
+
+class JsonLinesWriter:
+    """Append transactions one at a time to a JSON Lines file: a header line for the record then one line per transaction."""
+    def __init__(self, fp, p_record:InvestmentRecord):
+        """
+        :param         fp: open text file: in append mode the header is ONLY written if the file is empty
+        :param   p_record: owner, date and source file for the header
+        """
+        self._fp = fp
+        self.count = 0
+        if fp.tell() == 0:
+            header = { SCHEMA_KEY: SCHEMA_VERSION, "__class__": p_record.__class__.__name__, OWNER: p_record.get_owner(),
+                       "Source File": p_record.get_filename(), DATE: p_record.get_date_str() }
+            fp.write(json.dumps(header) + "\n")
+
+    def write(self, p_plan:str, p_type:str, p_tx):
+        self._fp.write(json.dumps(tx_to_json(p_tx, p_plan, p_type), separators = (',', ':')) + "\n")
+        self.count += 1
+
+
+def _tx_field(p_tx, p_key:str):
+    """:return the field of a transaction dict, TxRecord or CompactTxRecord, or None if NOT present"""
+    if isinstance(p_tx, dict):
+        return p_tx.get(p_key)
+    if isinstance(p_tx, TxRecord) and p_key not in (DATE, FUND, GROSS, FUND_CMPY, FUND_CODE, PRICE, UNITS, SWITCH, DESC, TYPE):
+        # AVOID the TxRecord log message for an unknown item
+        return None
+    return p_tx[p_key]
+
+def _tx_date(p_tx) -> str:
+    """:return the trade date of a transaction in ISO format"""
+    if _tx_field(p_tx, TRADE_YR):
+        return F"{p_tx[TRADE_YR]:04d}-{p_tx[TRADE_MTH]:02d}-{p_tx[TRADE_DAY]:02d}"
+    tx_date = _tx_field(p_tx, DATE)
+    if isinstance(tx_date, dt):
+        return tx_date.strftime("%Y-%m-%d")
+    return dt.strptime(tx_date, "%d-%b-%Y").strftime("%Y-%m-%d") if tx_date else ""
+
+
+class IngestLedger:
+    """
+    Append-only local record of the transactions and prices ALREADY imported to Gnucash,
+    as a hash per (owner, plan, fund code, trade date, units, gross), so re-runs skip them in O(1).
+    """
+    def __init__(self, p_file:str, p_logger:lg.Logger = None):
+        """:param  p_file: ledger file, one hex digest per line: created if NOT present"""
+        self._lgr = p_logger
+        self._file = p_file
+        self._keys = set()
+        if osp.isfile(p_file):
+            with open(p_file) as fp:
+                self._keys.update(line.strip() for line in fp if line.strip())
+        if self._lgr: self._lgr.debug(F"ledger '{p_file}' has {len(self._keys)} entries")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, p_key:str):
+        return p_key in self._keys
+
+    @staticmethod
+    def make_key(p_owner:str, p_plan:str, p_tx, p_type:str = TRADE) -> str:
+        """
+        :param  p_owner: of the record
+        :param   p_plan: of the transaction
+        :param     p_tx: transaction dict, TxRecord or CompactTxRecord
+        :param   p_type: TRADE or PRICE: prices use the price in place of units and gross
+        :return hex digest identifying the transaction
+        """
+        fund = _tx_field(p_tx, FUND_CODE) or _tx_field(p_tx, FUND)
+        if p_type == PRICE:
+            amounts = (PRICE, str(_tx_field(p_tx, PRICE)))
+        else:
+            amounts = (str(_tx_field(p_tx, UNITS)), str(_tx_field(p_tx, GROSS)))
+        text = "|".join((p_owner, p_plan, str(fund), _tx_date(p_tx)) + amounts)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def add(self, p_keys:list):
+        """record newly imported keys: appended and flushed right away so a crash CANNOT lose them"""
+        new_keys = [key for key in p_keys if key not in self._keys]
+        if not new_keys:
+            return
+        folder = osp.dirname(self._file)
+        if folder:
+            os.makedirs(folder, exist_ok = True)
+        with open(self._file, "a") as fp:
+            fp.write("\n".join(new_keys) + "\n")
+        self._keys.update(new_keys)
+        if self._lgr: self._lgr.debug(F"added {len(new_keys)} entries to ledger '{self._file}'")
+
+    def filter_new(self, p_record:InvestmentRecord, p_logger:lg.Logger = None, p_types:tuple = (TRADE,PRICE)) -> tuple:
+        """
+        :param  p_record: transactions to import
+        :param  p_logger: for the new record: default is the ledger logger
+        :param   p_types: ONLY these types are copied to the new record, e.g. (PRICE,) when loading prices,
+                          so the keys of the other types can NEVER be recorded by mistake
+        :return (new InvestmentRecord with ONLY the transactions NOT in the ledger AND NOT repeated in the record,
+                 dict of id(tx) -> key for them)
+        """
+        logger = p_logger or self._lgr or lg.getLogger(__name__)
+        fresh = InvestmentRecord(logger, _json_owner(p_record.get_owner()), p_record.get_date())
+        keys = {}
+        seen = set()  # keys in the record so far: overlapping reports may repeat transactions
+        for plan in (OPEN,TFSA,RRSP):
+            for tx_type in p_types:
+                for tx in p_record.get_plan(plan)[tx_type]:
+                    key = self.make_key(p_record.get_owner(), plan, tx, tx_type)
+                    if key not in self._keys and key not in seen:
+                        fresh.add_tx(plan, tx_type, tx)
+                        keys[id(tx)] = key
+                    seen.add(key)
+        if self._lgr: self._lgr.info(F"{fresh.get_size()} of {sum(p_record.get_size(type_spec = tx_type) for tx_type in p_types)}"
+                                     F" {'/'.join(p_types)} transactions are NEW")
+        return fresh, keys
+
+
 # TODO: TxRecord in standard format for both Monarch and Gnucash
 # noinspection PyAttributeOutsideInit
 class TxRecord:
     """All the required information for an individual transaction."""
     def __init__(self, p_logger:lg.Logger, p_dt:dt=None, p_dt_str:str="", p_sw:bool=False,
                  p_fcmpy:str="", p_fcode:str="", p_fname:str="", p_gr:float=0.0, p_gr_str:str="",
-                 p_pr:float=0.0, p_pr_str:str="", p_un:float=0.0, p_un_str:str=""):
+                 p_pr:float=0.0, p_pr_str:str="", p_un:float=0.0, p_un_str:str="", p_desc:str="", p_tx_type:str=""):
         self.date = dt.now()
         self.set_date(p_dt)
         self.date_str = p_dt_str
@@ -411,9 +632,13 @@ class TxRecord:
         self.price_str = p_pr_str
         self.units = p_un
         self.units_str = p_un_str
+        self.desc = p_desc        # description in the report
+        self.tx_type = p_tx_type  # e.g. PURCH, RDMPN, SW_IN
         self._lgr = p_logger
 
-        self._lgr.info(F"{self.__class__.__name__}: Runtime = {get_current_time()}")
+        # one per transaction: skip the formatting unless it will be logged
+        if self._lgr.isEnabledFor(lg.INFO):
+            self._lgr.info(F"{self.__class__.__name__}: Runtime = {get_current_time()}")
 
     def __getitem__(self, item):
         if item == DATE:
@@ -432,6 +657,10 @@ class TxRecord:
             return self.units
         if item == SWITCH:
             return self.switch
+        if item == DESC:
+            return self.desc
+        if item == TYPE:
+            return self.tx_type if self.tx_type else getattr(self, "type", None)
         else:
             self._lgr.info(F"UNKNOWN item: {item}")
             return None
@@ -459,3 +688,390 @@ class TxRecord:
             self._lgr.warning(F"BAD date: {p_date}")
         return old_date
 # END class TxRecord
+
+
+# fixed-point scale of the numeric fields of a CompactTxRecord
+GROSS_SCALE:int = 100
+PRICE_SCALE:int = 10000
+UNITS_SCALE:int = 10000
+
+# remove the dollar sign and thousands separators from a report amount
+_AMOUNT_DELETE = str.maketrans('', '', '$,')
+
+def to_fixed(p_amount:str, p_scale:int) -> int:
+    """
+    :param  p_amount: report amount e.g. '$1,234.56' or '(12.3456)'
+    :param   p_scale: e.g. GROSS_SCALE
+    :return the amount as an integer number of 1/p_scale, WITHOUT any float rounding
+    """
+    text = p_amount.strip().translate(_AMOUNT_DELETE)
+    if text.startswith('(') and text.endswith(')'):
+        text = '-' + text[1:-1]
+    return int((Decimal(text) * p_scale).to_integral_value()) if text else 0
+
+
+class CompactTxRecord:
+    """
+    Same information as a TxRecord in far less memory: slotted, numerics stored ONCE as fixed-point ints,
+    string views derived on demand and NO logger or timestamps per instance.
+    """
+    __slots__ = ("date", "switch", "company", "fd_name", "fd_code", "type", "gross_fixed", "price_fixed",
+                 "units_fixed", "_date_str", "desc", "tx_type")
+
+    def __init__(self, p_dt:dt=None, p_dt_str:str="", p_sw:bool=False, p_fcmpy:str="", p_fcode:str="",
+                 p_fname:str="", p_gross:int=0, p_price:int=0, p_units:int=0, p_type:str="", p_desc:str="",
+                 p_tx_type:str=""):
+        """
+        numerics in units of 1/GROSS_SCALE, 1/PRICE_SCALE and 1/UNITS_SCALE
+        :param     p_type: TRADE or PRICE
+        :param     p_desc: description in the report
+        :param  p_tx_type: kind of trade e.g. PURCH, RDMPN, SW_IN
+        """
+        self.date = p_dt
+        self._date_str = p_dt_str
+        self.switch = p_sw
+        self.company = p_fcmpy
+        self.fd_code = p_fcode
+        self.fd_name = p_fname
+        self.gross_fixed = p_gross
+        self.price_fixed = p_price
+        self.units_fixed = p_units
+        self.type = p_type
+        self.desc = p_desc
+        self.tx_type = p_tx_type
+
+    @classmethod
+    def from_strings(cls, p_dt:dt=None, p_dt_str:str="", p_sw:bool=False, p_fcmpy:str="", p_fcode:str="",
+                     p_fname:str="", p_gr_str:str="", p_pr_str:str="", p_un_str:str="", p_type:str="", p_desc:str="",
+                     p_tx_type:str=""):
+        """create directly from the report strings"""
+        return cls(p_dt, p_dt_str, p_sw, p_fcmpy, p_fcode, p_fname, to_fixed(p_gr_str, GROSS_SCALE) if p_gr_str else 0,
+                   to_fixed(p_pr_str, PRICE_SCALE) if p_pr_str else 0, to_fixed(p_un_str, UNITS_SCALE) if p_un_str else 0,
+                   p_type, p_desc, p_tx_type)
+
+    @classmethod
+    def from_tx_record(cls, p_tx:TxRecord):
+        return cls(p_tx.date, p_tx.date_str, p_tx.switch, p_tx.company, p_tx.fd_code, p_tx.fd_name,
+                   round(p_tx.gross * GROSS_SCALE), round(p_tx.price * PRICE_SCALE), round(p_tx.units * UNITS_SCALE),
+                   getattr(p_tx, "type", ""), p_tx.desc, p_tx.tx_type)
+
+    def to_tx_record(self, p_logger:lg.Logger) -> TxRecord:
+        txr = TxRecord(p_logger, self.date, self.date_str, self.switch, self.company, self.fd_code, self.fd_name,
+                       self.gross, self.gross_str, self.price, self.price_str, self.units, self.units_str,
+                       self.desc, self.tx_type)
+        if self.type:
+            txr.set_type(self.type)
+        return txr
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactTxRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__ if slot != "_date_str")
+
+    def __repr__(self):
+        return F"{self.__class__.__name__}({self.date_str}, {self.fd_code}, {self.gross_str}, {self.price_str}, {self.units_str})"
+
+    @property
+    def gross(self) -> float:
+        return self.gross_fixed / GROSS_SCALE
+
+    @property
+    def price(self) -> float:
+        return self.price_fixed / PRICE_SCALE
+
+    @property
+    def units(self) -> float:
+        return self.units_fixed / UNITS_SCALE
+
+    @property
+    def gross_str(self) -> str:
+        return F"{self.gross:.2f}"
+
+    @property
+    def price_str(self) -> str:
+        return F"{self.price:.4f}"
+
+    @property
+    def units_str(self) -> str:
+        return F"{self.units:.4f}"
+
+    @property
+    def date_str(self) -> str:
+        if not self._date_str and self.date:
+            return self.date.strftime("%d-%b-%Y")
+        return self._date_str
+
+    def __getitem__(self, item):
+        if item == DATE:
+            return self.date
+        if item == FUND:
+            return self.fd_name
+        if item == GROSS:
+            return self.gross
+        if item == FUND_CMPY:
+            return self.company
+        if item == FUND_CODE:
+            return self.fd_code
+        if item == PRICE:
+            return self.price
+        if item == UNITS:
+            return self.units
+        if item == SWITCH:
+            return self.switch
+        if item == TYPE:
+            return self.tx_type if self.tx_type else self.type
+        if item == DESC:
+            return self.desc
+        return None
+
+    def set_fund_cmpy(self, p_co:str):
+        self.company = p_co
+
+    def set_fund_code(self, p_code:str):
+        self.fd_code = p_code
+
+    def set_fund_name(self, p_name:str):
+        self.fd_name = p_name
+
+    def set_type(self, p_type):
+        if p_type in (TRADE,PRICE):
+            self.type = p_type
+
+    def set_date(self, p_date:dt) -> dt:
+        old_date = self.date
+        if p_date and isinstance(p_date, dt):
+            self.date = p_date
+        return old_date
+# END class CompactTxRecord
+
+
+# TxColumns dates: microseconds since datetime.min, or NO_DATE
+NO_DATE = -1
+_MICROSECOND = timedelta(microseconds = 1)
+_DAY_MICROS = timedelta(days = 1) // _MICROSECOND
+
+def _dt_to_micros(p_dt:dt) -> int:
+    return NO_DATE if p_dt is None else (p_dt - dt.min) // _MICROSECOND
+
+def _micros_to_dt(p_micros:int) -> dt:
+    return None if p_micros == NO_DATE else dt.min + timedelta(microseconds = p_micros)
+
+
+class TxColumns:
+    """Typed arrays, one entry per transaction, for the transactions of ONE plan and type."""
+    def __init__(self, p_funds:list, p_fund_ids:dict, p_kinds:list, p_kind_ids:dict):
+        """
+        :param     p_funds: (company, fund code, fund name) of each fund id, shared by ALL the columns of a record
+        :param  p_fund_ids: (company, fund code, fund name) -> fund id
+        :param     p_kinds: (description, kind of trade) of each kind id, shared by ALL the columns of a record
+        :param  p_kind_ids: (description, kind of trade) -> kind id
+        """
+        self._funds = p_funds
+        self._fund_ids = p_fund_ids
+        self._kinds = p_kinds
+        self._kind_ids = p_kind_ids
+        self.dates = array('q')     # full date and time, see _dt_to_micros()
+        self.fund_ids = array('I')
+        self.kind_ids = array('I')
+        self.gross = array('q')     # 1/GROSS_SCALE
+        self.price = array('q')     # 1/PRICE_SCALE
+        self.units = array('q')     # 1/UNITS_SCALE
+        self.switch = array('b')
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _fund_id(self, p_fund:tuple) -> int:
+        fund_id = self._fund_ids.get(p_fund)
+        if fund_id is None:
+            fund_id = len(self._funds)
+            self._fund_ids[p_fund] = fund_id
+            self._funds.append(p_fund)
+        return fund_id
+
+    def _kind_id(self, p_kind:tuple) -> int:
+        kind_id = self._kind_ids.get(p_kind)
+        if kind_id is None:
+            kind_id = len(self._kinds)
+            self._kind_ids[p_kind] = kind_id
+            self._kinds.append(p_kind)
+        return kind_id
+
+    def append(self, p_tx):
+        """:param  p_tx: TxRecord or CompactTxRecord"""
+        if not isinstance(p_tx, CompactTxRecord):
+            if not isinstance(p_tx, TxRecord):
+                raise Exception(F"CANNOT store a {type(p_tx)} in columns!")
+            p_tx = CompactTxRecord.from_tx_record(p_tx)
+        self.dates.append(_dt_to_micros(p_tx.date))
+        self.fund_ids.append(self._fund_id((p_tx.company, p_tx.fd_code, p_tx.fd_name)))
+        self.kind_ids.append(self._kind_id((p_tx.desc, p_tx.tx_type)))
+        self.gross.append(p_tx.gross_fixed)
+        self.price.append(p_tx.price_fixed)
+        self.units.append(p_tx.units_fixed)
+        self.switch.append(1 if p_tx.switch else 0)
+
+    def get_arrays(self) -> tuple:
+        """:return ALL the columns, in the order they are serialized"""
+        return self.dates, self.fund_ids, self.kind_ids, self.gross, self.price, self.units, self.switch
+
+    def get_fund_id(self, p_code:str) -> list:
+        """:return ids of ALL the funds with this fund code"""
+        return [fund_id for fund_id, fund in enumerate(self._funds) if fund[1] == p_code]
+
+    def get(self, p_index:int, p_type:str = "") -> CompactTxRecord:
+        company, code, name = self._funds[self.fund_ids[p_index]]
+        desc, tx_type = self._kinds[self.kind_ids[p_index]]
+        return CompactTxRecord(_micros_to_dt(self.dates[p_index]), "", bool(self.switch[p_index]), company, code, name,
+                               self.gross[p_index], self.price[p_index], self.units[p_index], p_type, desc, tx_type)
+
+    def select(self, p_fund:str = "", p_start:dt = None, p_end:dt = None) -> list:
+        """
+        :param   p_fund: optional fund code
+        :param  p_start: optional first date, inclusive
+        :param    p_end: optional last date, inclusive
+        :return indices of the matching transactions: NOT those with NO date if a date is given
+        """
+        indices = range(len(self.dates))
+        if p_fund:
+            fund_ids = set(self.get_fund_id(p_fund))
+            indices = compress(indices, map(fund_ids.__contains__, self.fund_ids))
+        if p_start or p_end:
+            # whole days, whatever the time of the transactions
+            first = (p_start.toordinal() - 1) * _DAY_MICROS if p_start else 0
+            last = p_end.toordinal() * _DAY_MICROS - 1 if p_end else _dt_to_micros(dt.max)
+            indices = (index for index in indices if first <= self.dates[index] <= last)
+        return list(indices)
+
+
+def _column_bytes(p_col:array) -> bytes:
+    if p_col.typecode == 'b':
+        return p_col.tobytes()
+    data = array('q', p_col)
+    if byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+def _read_column(fp, p_col:array, p_count:int):
+    """append p_count values written by _column_bytes() to the column"""
+    if p_col.typecode == 'b':
+        p_col.frombytes(fp.read(p_count))
+        return
+    data = array('q')
+    data.frombytes(fp.read(p_count * data.itemsize))
+    if byteorder != "little":
+        data.byteswap()
+    p_col.extend(data if p_col.typecode == data.typecode else data.tolist())
+
+
+class ColumnarInvestmentRecord:
+    """
+    Same content as an InvestmentRecord, held as typed columns per plan and type so many years of reports fit in memory,
+    with O(1) sizes and filtering by fund and date.
+    """
+    def __init__(self, p_owner:str = "", p_date:dt = None, p_fname:str = ""):
+        self._owner = p_owner
+        self._date = p_date if p_date and isinstance(p_date, dt) else now_dt
+        self._filename = p_fname
+        self._funds = []
+        self._fund_ids = {}
+        self._kinds = []
+        self._kind_ids = {}
+        self._columns = { plan: {tx_type: TxColumns(self._funds, self._fund_ids, self._kinds, self._kind_ids)
+                                 for tx_type in (TRADE,PRICE)} for plan in (OPEN,TFSA,RRSP) }
+
+    @classmethod
+    def from_record(cls, p_record:InvestmentRecord):
+        """:param  p_record: with TxRecords or CompactTxRecords"""
+        columnar = cls(p_record.get_owner() if p_record.get_owner() != UNKNOWN else "", p_record.get_date(),
+                       p_record.get_filename() if p_record.get_filename() != UNKNOWN else "")
+        for plan in (OPEN,TFSA,RRSP):
+            for tx_type in (TRADE,PRICE):
+                for tx in p_record.get_plan(plan)[tx_type]:
+                    columnar.add_tx(plan, tx_type, tx)
+        return columnar
+
+    def to_record(self, p_logger:lg.Logger) -> InvestmentRecord:
+        """:return InvestmentRecord in the existing dict layout, with CompactTxRecords"""
+        record = InvestmentRecord(p_logger, self._owner, self._date)
+        record.set_filename(self._filename)
+        for plan in (OPEN,TFSA,RRSP):
+            for tx_type in (TRADE,PRICE):
+                for tx in self.get_txs(plan, tx_type):
+                    record.add_tx(plan, tx_type, tx)
+        return record
+
+    def get_owner(self) -> str:
+        return UNKNOWN if not self._owner else self._owner
+
+    def get_date(self) -> dt:
+        return self._date
+
+    def get_filename(self) -> str:
+        return UNKNOWN if not self._filename else self._filename
+
+    def get_columns(self, p_plan:str, p_type:str) -> TxColumns:
+        return self._columns[p_plan][p_type]
+
+    def add_tx(self, plan, tx_type, obj):
+        if plan in self._columns and obj and tx_type in (TRADE, PRICE):
+            self._columns[plan][tx_type].append(obj)
+
+    def get_txs(self, p_plan:str, p_type:str, p_fund:str = "", p_start:dt = None, p_end:dt = None) -> list:
+        """:return CompactTxRecords of the plan and type, optionally ONLY for a fund code and/or date range"""
+        columns = self._columns[p_plan][p_type]
+        return [columns.get(index, p_type) for index in columns.select(p_fund, p_start, p_end)]
+
+    def get_size(self, plan_spec:str="", type_spec:str="") -> int:
+        plans = (plan_spec,) if plan_spec else (OPEN,TFSA,RRSP)
+        types = (type_spec,) if type_spec else (TRADE,PRICE)
+        return sum(len(self._columns[plan][tx_type]) for plan in plans for tx_type in types)
+
+    def get_size_str(self, plan_spec:str="", type_spec:str="") -> str:
+        if plan_spec in (OPEN, RRSP, TFSA):
+            if type_spec in (PRICE, TRADE):
+                return F"{type_spec}[{self.get_size(plan_spec,type_spec)}]"
+            return F"P{self.get_size(plan_spec,PRICE)}/T{self.get_size(plan_spec,TRADE)}"
+        return F"{self.get_size()} = {OPEN}:{self.get_size_str(OPEN)} + "\
+               + F"{TFSA}:{self.get_size_str(TFSA)} + {RRSP}:{self.get_size_str(RRSP)}"
+
+    def to_binary(self, fp):
+        """
+        magic, json header with the fund and kind tables, then for each plan and type: count + the columns,
+        each as little-endian int64s, except switch as single bytes, so the file is the same on EVERY platform
+        :param  fp: open binary file
+        """
+        header = json.dumps({ SCHEMA_KEY: SCHEMA_VERSION, BINARY_KEY: BINARY_VERSION, OWNER: self._owner,
+                              "Source File": self._filename, DATE: self._date.strftime(FILE_DATETIME_FORMAT),
+                              FUND: self._funds, TYPE: self._kinds }).encode("utf-8")
+        fp.write(BINARY_MAGIC + struct.pack("<I", len(header)) + header)
+        for plan in (OPEN,TFSA,RRSP):
+            for tx_type in (TRADE,PRICE):
+                columns = self._columns[plan][tx_type]
+                fp.write(struct.pack("<I", len(columns)))
+                for col in columns.get_arrays():
+                    fp.write(_column_bytes(col))
+
+    @classmethod
+    def from_binary(cls, fp):
+        """:param  fp: open binary file written by to_binary()"""
+        if fp.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise Exception("NOT a binary InvestmentRecord file!")
+        header = json.loads(fp.read(struct.unpack("<I", fp.read(4))[0]).decode("utf-8"))
+        if header.get(SCHEMA_KEY) != SCHEMA_VERSION or header.get(BINARY_KEY, 1) != BINARY_VERSION:
+            raise Exception(F"UNKNOWN schema: {header.get(SCHEMA_KEY)}/{header.get(BINARY_KEY, 1)}!")
+        record = cls(header[OWNER], dt.strptime(header[DATE], FILE_DATETIME_FORMAT), header["Source File"])
+        for fund in header[FUND]:
+            record._fund_ids[tuple(fund)] = len(record._funds)
+            record._funds.append(tuple(fund))
+        for kind in header[TYPE]:
+            record._kind_ids[tuple(kind)] = len(record._kinds)
+            record._kinds.append(tuple(kind))
+        for plan in (OPEN,TFSA,RRSP):
+            for tx_type in (TRADE,PRICE):
+                columns = record._columns[plan][tx_type]
+                count = struct.unpack("<I", fp.read(4))[0]
+                for col in columns.get_arrays():
+                    _read_column(fp, col, count)
+        return record
+# END class ColumnarInvestmentRecord
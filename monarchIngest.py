@@ -0,0 +1,103 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# monarchIngest.py
+#   -- parse many Monarch report files in parallel and merge them into one InvestmentRecord per owner
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.7+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from monarchParser import *
+
+ERRORS:str = "ERRORS"
+
+
+def parse_report_file(p_fname:str, p_level:int = lg.WARNING) -> InvestmentRecord:
+    """
+    parse ONE report file: called in a worker process
+    NOTE: the returned record and its transactions hold Loggers, which ONLY pickle, by name, from Python 3.7
+    :param  p_fname: Monarch report file
+    :param  p_level: log level for the worker
+    :return InvestmentRecord of the file
+    """
+    logger = lg.getLogger(F"{__name__}.{osp.basename(p_fname)}")
+    logger.setLevel(p_level)
+    return MonarchParser(logger).parse_file(p_fname)
+
+def merge_records(p_records:list, p_logger:lg.Logger) -> dict:
+    """
+    :param   p_records: InvestmentRecords, in any order
+    :param    p_logger: for the merged records
+    :return dict of owner -> new InvestmentRecord with ALL the transactions of that owner, each list ordered by date
+            with any undated transactions last, and the date of the latest report: records with NO transactions are skipped
+            and transactions repeated in overlapping reports are ONLY kept once, using the IngestLedger key
+    """
+    merged = {}
+    seen = {}  # owner -> IngestLedger keys of the transactions merged so far
+    for record in sorted(p_records, key = lambda rec: rec.get_date()):
+        if not record.get_size():
+            p_logger.warning(F"NO transactions in '{record.get_filename()}'")
+            continue
+        owner = record.get_owner()
+        target = merged.get(owner)
+        if target is None:
+            target = InvestmentRecord(p_logger, "" if owner == UNKNOWN else owner, record.get_date())
+            merged[owner] = target
+            seen[owner] = set()
+        target.set_date(record.get_date())
+        keys = seen[owner]
+        for plan in (OPEN,TFSA,RRSP):
+            for tx_type in (TRADE,PRICE):
+                txs = target.get_plan(plan)[tx_type]
+                for tx in record.get_plan(plan)[tx_type]:
+                    key = IngestLedger.make_key(owner, plan, tx, tx_type)
+                    if key not in keys:
+                        keys.add(key)
+                        txs.append(tx)
+    for target in merged.values():
+        for plan in (OPEN,TFSA,RRSP):
+            for txs in target.get_plan(plan).values():
+                # stable so transactions on the same date keep the report order
+                txs.sort(key = lambda tx: (tx[DATE] is None, tx[DATE] or dt.min))
+    return merged
+
+def ingest_reports(p_files:list, p_logger:lg.Logger, max_workers:int = None, p_level:int = lg.WARNING,
+                   p_progress = None) -> dict:
+    """
+    fan out the report files to a process pool and merge the results by owner
+    :param       p_files: Monarch report files
+    :param      p_logger: for this process and the merged records
+    :param   max_workers: default is the number of cores
+    :param       p_level: log level for the workers
+    :param    p_progress: optional callable(files done, total files, file name) called as each file finishes
+    :return dict of owner -> merged InvestmentRecord, plus ERRORS -> file -> error
+    """
+    total = len(p_files)
+    p_logger.info(F"ingest {total} files at {get_current_time()}")
+    records = []
+    errors = {}
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        futures = {executor.submit(parse_report_file, fname, p_level): fname for fname in p_files}
+        for done, future in enumerate(as_completed(futures), 1):
+            fname = futures[future]
+            try:
+                record = future.result()
+                records.append(record)
+                p_logger.info(F"[{done}/{total}] parsed '{fname}': {record.get_size_str()}")
+            except Exception as ex:
+                errors[fname] = repr(ex)
+                p_logger.error(F"[{done}/{total}] parse of '{fname}' FAILED: {repr(ex)}")
+            if p_progress:
+                p_progress(done, total, fname)
+
+    results = merge_records(records, p_logger)
+    for owner, record in results.items():
+        p_logger.info(F"{owner}: {record.get_size_str()}")
+    results[ERRORS] = errors
+    return results
@@ -0,0 +1,190 @@
+##############################################################################################################################
+# coding=utf-8
+#
+# monarchParser.py
+#   -- streaming, table-driven parser of Monarch report text into an InvestmentRecord
+#
+# Copyright (c) 2026 Mark Sattolo <epistemik@gmail.com>
+
+__author__         = "Mark Sattolo"
+__author_email__   = "epistemik@gmail.com"
+__python_version__ = "3.6+"
+__created__ = "2026-10-17"
+__updated__ = "2026-10-17"
+
+import re
+from functools import lru_cache
+from investment import *
+from fundRegistry import FUND_INFO, RETIRED_PREFIX, match_company
+
+# Report layout, one item per line, blank lines ignored:
+#     CLIENT TRANSACTIONS
+#     Date: 15-Mar-2024
+#     <owner>
+#     <plan> <plan id>
+#     <company name> ...
+#     <company code> <fund number> <fund description>
+#     Price: $12.3456 as of 15-Mar-2024
+#     15-Feb-2024 Purchase $1,000.00 $12.1234 82.4859
+#     15-Feb-2024 Switch-out ($500.00) $12.1234 (41.2430)
+#     ...
+# then more transactions, funds, companies, plans and owners in the same order.
+
+_DATE = r"(\d{1,2}-[A-Z][a-z]{2}-\d{4})"
+_AMOUNT = r"(\(?\$?[\d,]*\.\d+\)?)"
+
+RE_START   = re.compile(re.escape(CLIENT_TX))
+RE_DATE    = re.compile(DATE + r":?\s+" + _DATE)
+RE_OWNER   = re.compile(r"^(" + "|".join(re.escape(own) for own in (MON_MARK, MON_LULU)) + r")\b")
+RE_PLAN    = re.compile(r"^(" + "|".join(re.escape(plan) for plan in (OPEN, TFSA, RRSP)) + r")\b")
+RE_COMPANY = re.compile(r"^(" + "|".join(sorted((re.escape(name) for name in FUND_NAME_CODE), key = len, reverse = True))
+                        + r")\b", re.IGNORECASE)
+RE_FUND    = re.compile(r"^(" + "|".join(COMPANY_NAME) + r")\s?(\d{3,5})\b")
+RE_PRICE   = re.compile(PRICE + r":?\s+\$?([\d,]*\.\d+)\s+as of\s+" + _DATE)
+RE_TX      = re.compile(r"^" + _DATE + r"\s+(.+?)\s+" + _AMOUNT + r"\s+" + _AMOUNT + r"\s+" + _AMOUNT + r"$")
+
+SWITCH_TYPES = frozenset(PAIRED_TYPES)
+# kinds of trade as used by GnucashSession._build_trade_tx(), longest first so e.g. DCA_IN is NOT matched as SW_IN
+TRADE_TYPES = tuple(sorted(set(TX_TYPES.values()) | SWITCH_TYPES | {INCASH_TRIN, INCASH_TROUT}, key = len, reverse = True))
+
+
+@lru_cache(maxsize = 4096)
+def parse_report_date(p_date:str) -> dt:
+    """:return the datetime of a report date e.g. '15-Mar-2024': cached as reports repeat the same few dates"""
+    return dt.strptime(p_date, "%d-%b-%Y")
+
+
+@lru_cache(maxsize = 256)
+def match_tx_type(p_desc:str) -> str:
+    """:return the kind of trade in a report description e.g. 'Switch-in' -> SW_IN, else the description itself"""
+    desc = p_desc.lower()
+    for tx_type in TRADE_TYPES:
+        if tx_type.lower() in desc:
+            return tx_type
+    return p_desc
+
+
+def iter_report_lines(p_source):
+    """
+    :param  p_source: file name, OR an iterable of lines e.g. an open file
+    :return generator of the stripped, non-blank lines
+    """
+    if isinstance(p_source, str):
+        with open(p_source) as fp:
+            yield from iter_report_lines(fp)
+        return
+    for line in p_source:
+        line = line.strip()
+        if line:
+            yield line
+
+
+class MonarchParser:
+    """
+    Drive the investment.py parsing states from a transition table:
+    state -> ordered (compiled regex, handler, next state) rules, the first match on a line wins.
+    Lines that match NO rule of the current state are skipped.
+    """
+    def __init__(self, p_logger:lg.Logger, p_compact:bool = True):
+        """:param  p_compact: emit CompactTxRecords if True, else TxRecords"""
+        self._lgr = p_logger
+        self._compact = p_compact
+        self._record = None
+        self._plan = ""
+        self._company = ""
+        self._fund = ""
+        self.lines = 0
+        self.skipped = 0
+
+        # rules shared by ALL the states inside the transaction section
+        section = [
+            (RE_OWNER,   self._set_owner,   FIND_PLAN) ,
+            (RE_PLAN,    self._set_plan,    FIND_COMPANY) ,
+            (RE_FUND,    self._set_fund,    FIND_PRICE) ,
+            (RE_COMPANY, self._set_company, FIND_FUND)
+        ]
+        self._table = {
+            STATE_SEARCH : [(RE_START, None, FIND_DATE)] ,
+            FIND_DATE    : [(RE_DATE, self._set_date, FIND_OWNER)] ,
+            FIND_OWNER   : [(RE_OWNER, self._set_owner, FIND_PLAN)] ,
+            FIND_PLAN    : [(RE_PLAN, self._set_plan, FIND_COMPANY)] ,
+            FIND_COMPANY : section ,
+            FIND_FUND    : section ,
+            FIND_PRICE   : [(RE_PRICE, self._add_price, FIND_NEXT_TX)] + section ,
+            FIND_NEXT_TX : [(RE_TX, self._add_trade, FILL_CURR_TX)] + section ,
+            FILL_CURR_TX : [(RE_TX, self._add_trade, FILL_CURR_TX)] + section
+        }
+
+    def _set_date(self, p_match):
+        self._record.set_date(parse_report_date(p_match.group(1)))
+
+    def _set_owner(self, p_match):
+        owner = p_match.group(1)
+        if self._record.get_owner() not in (UNKNOWN, owner):
+            self._lgr.warning(F"owner changed from {self._record.get_owner()} to {owner}!")
+        self._record.set_owner(owner)
+        self._plan = ""
+
+    def _set_plan(self, p_match):
+        self._plan = p_match.group(1)
+        self._company = ""
+
+    def _set_company(self, p_match):
+        self._company = match_company(p_match.group(0))
+
+    def _set_fund(self, p_match):
+        self._company = p_match.group(1)
+        code = F"{p_match.group(1)} {p_match.group(2)}"
+        if code not in FUND_INFO and RETIRED_PREFIX + code in FUND_INFO:
+            code = RETIRED_PREFIX + code
+        elif code not in FUND_INFO:
+            self._lgr.warning(F"UNKNOWN fund: {code}")
+        self._fund = code
+
+    def _emit(self, p_type:str, p_tx:CompactTxRecord):
+        self._record.add_tx(self._plan, p_type, p_tx if self._compact else p_tx.to_tx_record(self._lgr))
+
+    def _add_price(self, p_match):
+        date_str = p_match.group(2)
+        self._emit(PRICE, CompactTxRecord.from_strings(parse_report_date(date_str), date_str, False, self._company,
+                                                       self._fund, self._fund, p_pr_str = p_match.group(1), p_type = PRICE))
+
+    def _add_trade(self, p_match):
+        date_str, desc, gross, price, units = p_match.groups()
+        tx_type = match_tx_type(desc)
+        self._emit(TRADE, CompactTxRecord.from_strings(parse_report_date(date_str), date_str, tx_type in SWITCH_TYPES,
+                                                       self._company, self._fund, self._fund, gross, price, units, TRADE,
+                                                       desc, tx_type))
+
+    def parse(self, p_lines, p_record:InvestmentRecord = None) -> InvestmentRecord:
+        """
+        :param    p_lines: iterable of report lines, see iter_report_lines()
+        :param   p_record: to add the transactions to; a new InvestmentRecord if None
+        :return the InvestmentRecord
+        """
+        self._record = p_record if p_record is not None else InvestmentRecord(self._lgr)
+        self.lines = 0
+        self.skipped = 0
+        table = self._table
+        state = STATE_SEARCH
+        rules = table[state]
+        for line in p_lines:
+            self.lines += 1
+            for regex, handler, next_state in rules:
+                match = regex.search(line)
+                if match:
+                    if handler:
+                        handler(match)
+                    if next_state != state:
+                        state = next_state
+                        rules = table[state]
+                    break
+            else:
+                self.skipped += 1
+        self._lgr.info(F"parsed {self.lines} lines, skipped {self.skipped}: {self._record.get_size_str()}")
+        return self._record
+
+    def parse_file(self, p_fname:str) -> InvestmentRecord:
+        """:return new InvestmentRecord with ALL the transactions in a Monarch report file"""
+        record = InvestmentRecord(self._lgr, p_fname = p_fname)
+        return self.parse(iter_report_lines(p_fname), record)